@@ -0,0 +1,97 @@
+import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import charts
+import csv_cache
+import utils
+
+DRAW = {
+    'bar': charts.draw_bar_chart,
+    'pie': charts.draw_pie_chart,
+}
+
+# Estado de cada proceso: datos cargados y una única figura reutilizada
+_worker = {}
+
+
+def _init_worker(path, kind, formats, output_dir):
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    _worker.update(
+        data=csv_cache.load(path),  # Caché binaria mapeada: los procesos comparten las mismas páginas
+        figure=figure,
+        ax=figure.subplots(),
+        draw=DRAW[kind],
+        formats=formats,
+        output_dir=output_dir,
+    )
+
+
+def _file_name(country):
+    return re.sub(r'[^\w.-]+', '_', country).strip('_')
+
+
+def _render(country):
+    result = utils.population_by_country(_worker['data'], country)
+    if len(result) == 0:
+        return country, []
+    labels, values = utils.get_population(result[0])
+
+    ax = _worker['ax']
+    ax.clear()
+    _worker['draw'](ax, list(labels), list(values))
+    ax.set_title(country)
+
+    paths = []
+    for fmt in _worker['formats']:
+        path = os.path.join(_worker['output_dir'], f'{_file_name(country)}.{fmt}')
+        _worker['figure'].savefig(path, format=fmt)
+        paths.append(path)
+    return country, paths
+
+
+def render_countries(path, countries, output_dir, formats=('png',), kind='bar', workers=None):
+    """
+    Genera sin pantalla (backend Agg) un gráfico por país y lo guarda en output_dir.
+    Los países se reparten entre un pool de procesos; cada proceso carga los datos
+    una vez y reutiliza la misma figura, limpiándola entre gráficos.
+    Devuelve {país: [rutas generadas]} (lista vacía si el país no existe).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count()
+    chunksize = max(1, len(countries) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(path, kind, tuple(formats), output_dir)) as executor:
+        return dict(executor.map(_render, countries, chunksize=chunksize))
+
+
+def run():
+    parser = argparse.ArgumentParser(description='Render population charts without a display')
+    parser.add_argument('countries', nargs='*', help='countries to render (default: all)')
+    parser.add_argument('--data', default='./app/data.csv')
+    parser.add_argument('--output', default='./charts')
+    parser.add_argument('--format', action='append', choices=['png', 'svg'], dest='formats')
+    parser.add_argument('--kind', default='bar', choices=sorted(DRAW))
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    countries = args.countries
+    if not countries:
+        countries = list(csv_cache.load(args.data).column(utils.COUNTRY_COLUMN))
+    result = render_countries(args.data, countries, args.output, args.formats or ['png'],
+                              args.kind, args.workers)
+    missing = [country for country, paths in result.items() if not paths]
+    print(f'{len(result) - len(missing)} charts written to {args.output}')
+    if missing:
+        print('Not found:', missing)
+
+
+if __name__ == '__main__':
+    run()
@@ -1,15 +1,125 @@
+import math
+
 import  matplotlib.pyplot as plt
 
+import instrument
+
+@instrument.timed('charts.draw_bar_chart')
+def draw_bar_chart(ax, labels, values):
+    ax.bar(labels, values)
+
+@instrument.timed('charts.draw_pie_chart')
+def draw_pie_chart(ax, labels, values):
+    ax.pie(values, labels=labels)
+    ax.axis('equal')
+
+@instrument.timed('charts.generate_bar_chart')
 def generate_bar_chart(labels, values):
     fig, ax = plt.subplots()
-    ax.bar(labels, values)
+    draw_bar_chart(ax, labels, values)
     plt.show()
+    plt.close(fig)
 
+@instrument.timed('charts.generate_pie_chart')
 def generate_pie_chart(labels, values):
     fig, ax = plt.subplots()
-    ax.pie(values, labels=labels)
-    ax.axis('equal')
+    draw_pie_chart(ax, labels, values)
     plt.show()
+    plt.close(fig)
+
+
+class ChartSession:
+    """
+    Mantiene una única figura abierta para consultas repetidas.
+    Las barras (o las porciones del pastel) se crean una vez y después solo
+    se actualizan sus alturas/ángulos; el redibujado usa blitting, es decir,
+    se restaura el fondo guardado y solo se pintan los artistas de datos.
+    La figura completa solo se redibuja si cambian las etiquetas o la escala.
+    """
+
+    def __init__(self, kind='bar'):
+        self.kind = kind
+        self.fig, self.ax = plt.subplots()
+        self._labels = None
+        self._artists = []
+        self._background = None
+        self._caption = self.ax.text(0.02, 0.95, '', transform=self.ax.transAxes, animated=True)
+        self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+        plt.show(block=False)
+
+    def _on_draw(self, event):
+        self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in self._artists + [self._caption]:
+            self.ax.draw_artist(artist)
+
+    def _rebuild(self, labels, values):
+        self.ax.clear()
+        self._caption = self.ax.text(0.02, 0.95, '', transform=self.ax.transAxes, animated=True)
+        if self.kind == 'bar':
+            self._artists = list(self.ax.bar(labels, values))
+        else:
+            wedges, texts = self.ax.pie(values, labels=labels)
+            self.ax.axis('equal')
+            self._artists = list(wedges) + list(texts)
+        for artist in self._artists:
+            artist.set_animated(True)
+        self._labels = labels
+
+    def _update_bars(self, values):
+        for bar, value in zip(self._artists, values):
+            bar.set_height(value)
+        top = self.ax.get_ylim()[1]
+        highest = max(values, default=0)
+        # Si las barras salen del eje o quedan muy bajas hay que cambiar la escala
+        if highest > top or highest < top / 4:
+            self.ax.set_ylim(0, highest * 1.05 or 1)
+            return True
+        return False
+
+    def _update_pie(self, values):
+        count = len(values)
+        wedges, texts = self._artists[:count], self._artists[count:]
+        total = sum(values) or 1
+        theta = 0
+        for wedge, text, value in zip(wedges, texts, values):
+            span = 360 * value / total
+            wedge.set_theta1(theta)
+            wedge.set_theta2(theta + span)
+            middle = math.radians(theta + span / 2)
+            x, y = 1.1 * math.cos(middle), 1.1 * math.sin(middle)
+            text.set_position((x, y))
+            text.set_horizontalalignment('left' if x > 0 else 'right')
+            theta += span
+        return False
+
+    @instrument.timed('charts.ChartSession.show')
+    def show(self, labels, values, title=''):
+        labels = list(labels)
+        values = list(values)
+        canvas = self.fig.canvas
+        if labels != self._labels:
+            self._rebuild(labels, values)
+            full_redraw = True
+        elif self.kind == 'bar':
+            full_redraw = self._update_bars(values)
+        else:
+            full_redraw = self._update_pie(values)
+        self._caption.set_text(title)
+
+        if full_redraw or self._background is None:
+            # draw() dispara draw_event, que guarda el fondo y pinta los datos
+            canvas.draw()
+        else:
+            canvas.restore_region(self._background)
+            self._draw_artists()
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
+    def close(self):
+        plt.close(self.fig)
 
 if __name__ == '__main__':
     labels = ['a', 'b', 'c']
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+import instrument
+import read_csv
+from validation import ErrorReport
+
+MAGIC = b'CSVCOL01'
+SUFFIX = '.colcache'
+SAMPLE_SIZE = 1 << 16
+
+
+def cache_path(path):
+    return path + SUFFIX
+
+
+def source_signature(path):
+    """
+    Identifica la versión del CSV: fecha de modificación, tamaño y un hash
+    SHA-256 de tres muestras (inicio, mitad y final), para no tener que leer
+    el archivo completo en cada arranque.
+    """
+    stat = os.stat(path)
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for offset in (0, stat.st_size // 2, max(0, stat.st_size - SAMPLE_SIZE)):
+            source.seek(offset)
+            digest.update(source.read(SAMPLE_SIZE))
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'hash': digest.hexdigest()}
+
+
+class DictColumn:
+    """
+    Columna de texto codificada como diccionario: los valores distintos se
+    guardan una vez y cada fila es un código entero (int32 en el archivo).
+    """
+
+    __slots__ = ('values', 'codes')
+
+    def __init__(self, values, codes):
+        self.values = values
+        self.codes = codes
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.values[code] for code in self.codes[index]]
+        return self.values[self.codes[index]]
+
+    def __iter__(self):
+        return map(self.values.__getitem__, self.codes)
+
+
+def write_cache(path, data, signature, errors=None, coerce=False):
+    """
+    Guarda ColumnarData en el archivo de caché junto con el informe de
+    celdas no válidas (ErrorReport.to_dict()) y el modo de lectura (coerce
+    de read_csv_columns). Formato: MAGIC, longitud de
+    los metadatos (uint64), metadatos JSON y los bloques de cada columna
+    alineados a 8 bytes (float64 para las numéricas, int32 para los códigos
+    de las de texto). Se escribe en un archivo temporal y se renombra, así
+    un lector nunca ve una caché a medias.
+    """
+    blocks = []
+    columns = []
+    offset = 0
+    for name in data.header:
+        column = data.column(name)
+        if isinstance(column, (array, memoryview)):
+            block = array('d', column).tobytes()
+            columns.append({'name': name, 'kind': 'f8', 'offset': offset, 'length': len(block)})
+        else:
+            positions = {}
+            codes = array('i', (positions.setdefault(value, len(positions)) for value in column))
+            block = codes.tobytes()
+            columns.append({'name': name, 'kind': 'dict', 'offset': offset, 'length': len(block),
+                            'values': list(positions)})
+        blocks.append(block)
+        offset += len(block)
+        padding = -offset % 8
+        blocks.append(b'\0' * padding)
+        offset += padding
+
+    meta = json.dumps({
+        'source': signature,
+        'byteorder': sys.byteorder,
+        'rows': len(data),
+        'columns': columns,
+        'errors': errors or {},
+        'coerce': coerce,
+    }).encode('utf-8')
+    meta += b' ' * (-(len(MAGIC) + 8 + len(meta)) % 8)
+
+    target = cache_path(path)
+    temporary = f'{target}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as cache:
+        cache.write(MAGIC)
+        cache.write(struct.pack('<Q', len(meta)))
+        cache.write(meta)
+        for block in blocks:
+            cache.write(block)
+    os.replace(temporary, target)
+
+
+def read_cache(path, signature=None, report=None, coerce=None):
+    """
+    Abre la caché de path con mmap. Las columnas numéricas son memoryview
+    sobre el archivo mapeado (sin copiar datos) y las de texto DictColumn
+    con los códigos también mapeados. Devuelve None si la caché no existe,
+    no corresponde a la versión actual del CSV o se escribió con otro modo
+    de lectura (coerce, por defecto activo si se pasa report). Las celdas
+    no válidas guardadas al crearla se añaden a report si se indica.
+    """
+    if coerce is None:
+        coerce = report is not None
+    try:
+        with open(cache_path(path), 'rb') as cache:
+            if os.fstat(cache.fileno()).st_size < len(MAGIC) + 8:
+                return None
+            buffer = mmap.mmap(cache.fileno(), 0, access=mmap.ACCESS_READ)
+    except OSError:
+        return None
+
+    if buffer[:len(MAGIC)] != MAGIC:
+        return None
+    try:
+        meta_size, = struct.unpack_from('<Q', buffer, len(MAGIC))
+        start = len(MAGIC) + 8
+        meta = json.loads(buffer[start:start + meta_size])
+    except ValueError:
+        return None  # Caché dañada: se vuelve a leer el CSV
+    if meta['byteorder'] != sys.byteorder:
+        return None
+    if meta['source'] != (signature or source_signature(path)):
+        return None
+    if meta.get('coerce', True) != coerce:  # Las cachés anteriores se escribían siempre con coerce
+        return None
+
+    view = memoryview(buffer)
+    base = start + meta_size
+    header = []
+    columns = {}
+    for column in meta['columns']:
+        block = view[base + column['offset']:base + column['offset'] + column['length']]
+        header.append(column['name'])
+        if column['kind'] == 'f8':
+            columns[column['name']] = block.cast('d')
+        else:
+            values = [sys.intern(value) for value in column['values']]
+            columns[column['name']] = DictColumn(values, block.cast('i'))
+    if report is not None:
+        for name, errors in meta.get('errors', {}).items():
+            report.add(name, errors['count'], (tuple(sample) for sample in errors['samples']))
+    return read_csv.ColumnarData(header, columns)
+
+
+@instrument.timed('csv_cache.load')
+def load(path, report=None):
+    """
+    Devuelve el CSV como ColumnarData usando la caché binaria si está al día;
+    si no, lo lee con read_csv y escribe la caché para el próximo arranque.
+    Como en read_csv_columns, con report las columnas mayoritariamente
+    numéricas guardan como NaN sus celdas no válidas, que se añaden a report
+    (también al leer la caché); sin report se usa la lectura estricta.
+    """
+    coerce = report is not None
+    signature = source_signature(path)
+    data = read_cache(path, signature, report, coerce)
+    if data is not None:
+        return data
+    errors = ErrorReport()
+    data = read_csv.read_csv(path, columnar=True, report=errors, coerce=coerce)
+    if report is not None:
+        report.merge(errors)
+    try:
+        write_cache(path, data, signature, errors.to_dict(), coerce)
+    except OSError as error:
+        # Sin permisos de escritura junto al CSV: se trabaja sin caché
+        print(error)
+    return data
+
+
+if __name__ == '__main__':
+    data = load(sys.argv[1] if len(sys.argv) > 1 else './app/data.csv')
+    print(len(data), 'filas')
+    print(data[0])
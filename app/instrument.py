@@ -0,0 +1,243 @@
+import cProfile
+import functools
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Límites superiores (segundos) de los intervalos del histograma de cada etapa
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float('inf'))
+
+_enabled = os.environ.get('APP_METRICS', '0') != '0'
+_stages = {}
+_lock = threading.Lock()
+_null = nullcontext()
+# Campo con las salidas de un callback en el cuerpo JSON de una petición de Dash
+_DASH_OUTPUT = re.compile(rb'"output"\s*:\s*"([^"]*)"')
+
+
+class Stage:
+    """Contador, tiempo total, máximo e histograma de una etapa."""
+
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        for position, limit in enumerate(BUCKETS):
+            if seconds <= limit:
+                self.buckets[position] += 1
+                break
+
+
+def enabled():
+    return _enabled
+
+
+def enable(value=True):
+    global _enabled
+    _enabled = value
+
+
+def record(name, seconds):
+    with _lock:
+        stage = _stages.get(name)
+        if stage is None:
+            stage = _stages[name] = Stage()
+        stage.add(seconds)
+
+
+class _Timer:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def timer(name):
+    """
+    Mide el bloque with como la etapa name. Desactivado devuelve un
+    contexto vacío compartido, sin leer el reloj.
+    """
+    if not _enabled:
+        return _null
+    return _Timer(name)
+
+
+def timed(name=None):
+    """
+    Decorador que mide cada llamada como una etapa (por defecto
+    módulo.función). Desactivado solo añade una comprobación por llamada.
+    """
+    def decorate(function):
+        stage = name or f'{function.__module__}.{function.__qualname__}'
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(stage, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def reset():
+    with _lock:
+        _stages.clear()
+
+
+def snapshot():
+    """{etapa: {count, total, mean, max, buckets}} con los histogramas acumulados."""
+    with _lock:
+        stages = {name: (stage.count, stage.total, stage.max, list(stage.buckets))
+                  for name, stage in _stages.items()}
+    result = {}
+    for name, (count, total, maximum, buckets) in sorted(stages.items()):
+        cumulative = 0
+        histogram = {}
+        for limit, hits in zip(BUCKETS, buckets):
+            cumulative += hits
+            histogram['+Inf' if limit == float('inf') else repr(limit)] = cumulative
+        result[name] = {
+            'count': count,
+            'total': total,
+            'mean': total / count if count else 0.0,
+            'max': maximum,
+            'buckets': histogram,
+        }
+    return result
+
+
+def prometheus_text(prefix='app_stage_seconds'):
+    """Las etapas en el formato de texto de Prometheus (tipo histogram)."""
+    lines = [f'# HELP {prefix} Duración de cada etapa instrumentada.', f'# TYPE {prefix} histogram']
+    for name, stage in snapshot().items():
+        label = name.replace('\\', '\\\\').replace('"', '\\"')
+        for limit, cumulative in stage['buckets'].items():
+            lines.append(f'{prefix}_bucket{{stage="{label}",le="{limit}"}} {cumulative}')
+        lines.append(f'{prefix}_sum{{stage="{label}"}} {stage["total"]!r}')
+        lines.append(f'{prefix}_count{{stage="{label}"}} {stage["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def report():
+    """Tabla de texto con las etapas ordenadas por tiempo total."""
+    stages = sorted(snapshot().items(), key=lambda item: item[1]['total'], reverse=True)
+    lines = [f"{'etapa':<40} {'llamadas':>9} {'total ms':>10} {'media ms':>10} {'máx ms':>10}"]
+    for name, stage in stages:
+        lines.append(f"{name:<40} {stage['count']:>9} {stage['total'] * 1000:>10.2f} "
+                     f"{stage['mean'] * 1000:>10.3f} {stage['max'] * 1000:>10.3f}")
+    return '\n'.join(lines)
+
+
+class ProfileResult:
+    def __init__(self):
+        self.text = ''
+
+
+@contextmanager
+def profile(path=None, limit=20):
+    """
+    Ejecuta el bloque con cProfile. Guarda las estadísticas en path (para
+    pstats o snakeviz) si se indica y devuelve en el atributo text las
+    limit funciones con más tiempo acumulado.
+    """
+    profiler = cProfile.Profile()
+    result = ProfileResult()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        if path:
+            profiler.dump_stats(path)
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(limit)
+        result.text = output.getvalue()
+
+
+class ProfileMiddleware:
+    """
+    Middleware WSGI que ejecuta con cProfile solo las peticiones que lo
+    piden: con ?profile=1 en la URL o la cabecera X-Profile: 1. Las rutas de
+    paths se perfilan además sin pedirlo, limitadas (si se indica outputs)
+    a los callbacks de Dash cuya salida incluye alguno de esos componentes.
+    Cada perfil se guarda en directory (ruta.marca.pstats) y las limit
+    funciones con más tiempo acumulado se muestran en stderr. Se perfila una
+    petición a la vez (las demás se atienden sin perfil) y la respuesta se
+    lee completa, así que no sirve para streams sin fin como /stream.
+    """
+
+    def __init__(self, app, directory, paths=(), outputs=(), limit=20):
+        self.app = app
+        self.directory = directory
+        self.paths = tuple(paths)
+        self.outputs = tuple(outputs)
+        self.limit = limit
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _requested(self, environ, route):
+        if 'profile=1' in environ.get('QUERY_STRING', '').split('&') or environ.get('HTTP_X_PROFILE') == '1':
+            return True
+        if route not in self.paths:
+            return False
+        if not self.outputs:
+            return True
+        # Petición de Dash: {"output": "id.propiedad" o "..id.prop...id.prop..", ...}. Se busca el
+        # campo en los bytes sin decodificar el JSON completo (puede llevar un archivo cargado)
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return False
+        body = environ['wsgi.input'].read(length)
+        environ['wsgi.input'] = io.BytesIO(body)
+        match = _DASH_OUTPUT.search(body)
+        if match is None:
+            return False
+        output = match.group(1).decode('utf-8', 'replace')
+        targets = {part.rsplit('.', 1)[0] for part in output.strip('.').split('...')}
+        return any(name in targets for name in self.outputs)
+
+    def __call__(self, environ, start_response):
+        route = environ.get('PATH_INFO', '/')
+        if not self._requested(environ, route) or not self._lock.acquire(blocking=False):
+            return self.app(environ, start_response)
+        try:
+            name = route.strip('/').replace('/', '.') or 'index'
+            path = os.path.join(self.directory, f'{name}.{time.time_ns()}.pstats')
+            with profile(path, self.limit) as result:
+                response = self.app(environ, start_response)
+                try:
+                    body = list(response)
+                finally:
+                    if hasattr(response, 'close'):
+                        response.close()
+        finally:
+            self._lock.release()
+        print(f'Perfil de {route} guardado en {path}\n{result.text}', file=sys.stderr)
+        return body
@@ -0,0 +1,174 @@
+import os
+import threading
+
+FSYNC_POLICIES = ('never', 'flush', 'close')
+BLOCK_SIZE = 1 << 20
+try:
+    IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, ValueError, OSError):
+    IOV_MAX = -1  # Sin os.sysconf, nombre desconocido en este sistema o límite no disponible
+if IOV_MAX <= 0:
+    IOV_MAX = 1024  # sysconf devuelve -1 cuando no hay límite definido
+
+
+class BatchWriter:
+    """
+    Escritor de líneas en modo append que las acumula y las escribe por lotes:
+    cuando hay batch_size líneas pendientes, cada flush_interval segundos (hilo
+    en segundo plano) y al cerrar. Las líneas son cadenas sin el salto final;
+    cada lote se codifica de una vez y se escribe con una sola llamada al
+    sistema (o con os.writev, una línea por búfer, si vectored=True).
+
+    Varios hilos pueden escribir a la vez: las líneas se encolan con un
+    candado y los lotes se escriben en orden. El archivo se abre con
+    O_APPEND, así que varios procesos pueden añadir al mismo archivo sin
+    pisarse: cada llamada al sistema escribe líneas completas de una vez.
+    Solo si el sistema escribe menos de lo pedido (disco lleno, señal) el
+    resto de la línea cortada va en otra llamada y otro proceso podría
+    escribir entre las dos mitades; las líneas siguientes se escriben de
+    nuevo enteras. fsync: 'never' (lo decide el sistema operativo), 'flush'
+    (después de cada lote) o 'close' (solo al cerrar).
+
+    Un error al escribir desde el hilo en segundo plano no lo detiene: se
+    guarda y se lanza en la siguiente llamada a write, write_many, flush o
+    close.
+    """
+
+    def __init__(self, path, batch_size=1000, flush_interval=1.0, fsync='never', vectored=False,
+                 encoding='utf-8'):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f'fsync debe ser uno de {FSYNC_POLICIES}: {fsync!r}')
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.vectored = vectored and hasattr(os, 'writev')
+        self.encoding = encoding
+        self.closed = False
+        self.lines_written = 0
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._pending = []
+        self._lock = threading.Lock()  # Protege _pending
+        self._write_lock = threading.Lock()  # Un solo lote en escritura, en orden
+        self._stop = threading.Event()
+        self._error = None  # Error del hilo de vaciado, pendiente de lanzar
+        self._flusher = None
+        if flush_interval:
+            self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+            self._flusher.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def _raise_error(self):
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def write(self, line):
+        with self._lock:
+            if self.closed:
+                raise ValueError('BatchWriter cerrado')
+            self._raise_error()
+            pending = self._pending
+            pending.append(line)
+            if len(pending) < self.batch_size:
+                return
+        self.flush()
+
+    def write_many(self, lines):
+        with self._lock:
+            if self.closed:
+                raise ValueError('BatchWriter cerrado')
+            self._raise_error()
+            self._pending.extend(lines)
+            if len(self._pending) < self.batch_size:
+                return
+        self.flush()
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                self._raise_error()
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            if self.vectored:
+                self._writev([f'{line}\n'.encode(self.encoding) for line in batch])
+            else:
+                self._write_all(('\n'.join(batch) + '\n').encode(self.encoding))
+            self.lines_written += len(batch)
+            if self.fsync == 'flush':
+                os.fsync(self._fd)
+
+    def _write_all(self, data):
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self._fd, view):]
+
+    def _writev(self, buffers):
+        start = 0
+        while start < len(buffers):
+            chunk = buffers[start:start + IOV_MAX]
+            written = os.writev(self._fd, chunk)
+            for buffer in chunk:
+                if written < len(buffer):
+                    break
+                written -= len(buffer)
+                start += 1
+            else:
+                continue
+            # Escritura parcial: se termina la línea cortada y se sigue con líneas completas
+            self._write_all(memoryview(buffers[start])[written:])
+            start += 1
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as error:
+                with self._lock:
+                    self._error = error  # Se lanza en la siguiente escritura
+
+    def close(self):
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        try:
+            self.flush()
+            if self.fsync != 'never':
+                os.fsync(self._fd)
+        finally:
+            os.close(self._fd)
+
+
+def iter_line_batches(path, block_size=BLOCK_SIZE, encoding='utf-8'):
+    """
+    Lee el archivo en bloques de block_size bytes y entrega en cada uno la
+    lista de líneas completas (sin el salto de línea), separadas de una vez
+    con split. La línea cortada al final del bloque pasa al siguiente.
+    """
+    rest = b''
+    with open(path, 'rb', buffering=0) as source:
+        while True:
+            block = source.read(block_size)
+            if not block:
+                break
+            end = block.rfind(b'\n')
+            if end < 0:
+                rest += block
+                continue
+            lines = (rest + block[:end]).decode(encoding).split('\n')
+            rest = block[end + 1:]
+            yield lines
+    if rest:
+        yield [rest.decode(encoding)]
+
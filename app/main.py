@@ -1,22 +1,47 @@
+import os
+import sys
 import utils
 import charts
-import read_csv
+import instrument
+import multi_load
+from validation import ErrorReport
 
-def run():
-    data = read_csv.read_csv('./app/data.csv')
-    country = input('Type Country => ')
+def run(pattern='./app/data.csv'):
+    report = ErrorReport()
+    data, errors = multi_load.load_csv_files(pattern, report=report)
+    for path, error in errors:
+        print(path, error)
+    if not data.header:
+        sys.exit('No se pudo cargar ningún archivo')
+    if report:
+        print(report)
+    session = charts.ChartSession()
+    while True:
+        country = input('Type Country (empty to exit) => ')
+        if not country:
+            break
 
-    result = utils.population_by_country(data, country)
+        result = utils.population_by_country(data, country)
 
-    if len(result) > 0:
-        country = result[0]
-        labels, values = utils.get_population(country)
-        print(labels, values)
-        charts.generate_bar_chart(labels, values)
-    print(result)
+        if len(result) > 0:
+            country = result[0]
+            labels, values = utils.get_population(country)
+            print(labels, values)
+            session.show(labels, values, country['Country/Territory'])
+        print(result)
+    session.close()
+    if instrument.enabled():
+        print(instrument.report())
 
 
 
 
 if __name__ == '__main__':
-    run()
\ No newline at end of file
+    # APP_METRICS=1 muestra el tiempo de cada etapa al salir;
+    # APP_PROFILE=main.pstats guarda además un perfil de cProfile
+    if os.environ.get('APP_PROFILE'):
+        with instrument.profile(os.environ['APP_PROFILE']) as profile:
+            run(*sys.argv[1:2])
+        print(profile.text)
+    else:
+        run(*sys.argv[1:2])
\ No newline at end of file
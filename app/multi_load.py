@@ -0,0 +1,136 @@
+import glob
+import os
+import sys
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import csv_cache
+import instrument
+import read_csv
+from validation import ErrorReport
+
+
+def _load(path, cache=False, coerce=False):
+    # Se ejecuta en cada proceso: los fallos se devuelven en lugar de detener la carga
+    # Con coerce las celdas no numéricas se guardan como NaN y se anotan en el informe
+    report = ErrorReport() if coerce else None
+    try:
+        if cache:
+            return path, csv_cache.load(path, report), None, report
+        return path, read_csv.read_csv(path, columnar=True, report=report), None, report
+    except StopIteration:
+        return path, None, ValueError('Archivo vacío'), report
+    except Exception as error:
+        return path, None, error, report
+
+
+def _check_schema(header, data):
+    if sorted(data.header) != sorted(header):
+        missing = [name for name in header if name not in data.header]
+        extra = [name for name in data.header if name not in header]
+        raise ValueError(f'Columnas distintas: faltan {missing}, sobran {extra}')
+
+
+def _merge(header, parts):
+    # Une las columnas de cada archivo; si una columna es numérica en unos archivos
+    # y de texto en otros, el resultado es de texto
+    columns = {}
+    for name in header:
+        pieces = [data.column(name) for data in parts]
+        if all(isinstance(piece, (array, memoryview)) for piece in pieces):
+            column = array('d')
+            for piece in pieces:
+                column.extend(piece)
+        else:
+            column = []
+            for piece in pieces:
+                if isinstance(piece, (array, memoryview)):
+                    column.extend(sys.intern(read_csv._to_text(value)) for value in piece)
+                else:
+                    # Las cadenas llegan copiadas desde otro proceso: se vuelven a internar
+                    column.extend(sys.intern(value) for value in piece)
+        columns[name] = column
+    return read_csv.ColumnarData(header, columns)
+
+
+@instrument.timed('load_csv_files')
+def load_csv_files(pattern, header=None, workers=None, cache=True, report=None):
+    """
+    Carga todos los CSV que coinciden con el patrón glob (por ejemplo
+    './regiones/*.csv') en un único ColumnarData. Cada archivo se lee en un
+    proceso distinto con read_csv.read_csv(columnar=True).
+
+    Todos los archivos deben tener las columnas de header (el orden puede
+    variar); si no se indica, se usan las columnas más frecuentes entre los
+    archivos leídos. Los archivos que no se pueden leer o no cumplen el
+    esquema no detienen la carga: se devuelven en la lista de errores como
+    pares (ruta, excepción). Si el patrón no coincide con ningún archivo, el
+    error es (patrón, FileNotFoundError). Sin ningún archivo válido el
+    resultado es un ColumnarData vacío (sin columnas).
+
+    Con cache=True los archivos con caché binaria al día (csv_cache) se
+    mapean en memoria en este proceso y solo los demás se leen en paralelo,
+    dejando su caché escrita para la próxima vez.
+
+    Con report, cada archivo se lee con coerce (ver read_csv_columns): las
+    celdas no numéricas de columnas numéricas se añaden a report
+    (ErrorReport), con el nombre del archivo delante de la columna si hay
+    varios archivos. Sin report la lectura es estricta.
+    """
+    paths = sorted(path for path in glob.glob(pattern, recursive=True) if not path.endswith(csv_cache.SUFFIX))
+    if not paths:
+        return read_csv.ColumnarData([], {}), [(pattern, FileNotFoundError(f'Ningún archivo coincide con {pattern}'))]
+    coerce = report is not None
+    cached = {}
+    if cache:
+        for path in paths:
+            file_report = ErrorReport() if coerce else None
+            data = csv_cache.read_cache(path, report=file_report, coerce=coerce) if os.path.isfile(path) else None
+            if data is not None:
+                cached[path] = (path, data, None, file_report)
+    pending = [path for path in paths if path not in cached]
+    if len(pending) <= 1 or workers == 1:
+        loaded = [_load(path, cache, coerce) for path in pending]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            loaded = list(executor.map(_load, pending, [cache] * len(pending), [coerce] * len(pending)))
+    loaded = {result[0]: result for result in loaded}
+    results = [cached.get(path) or loaded[path] for path in paths]
+
+    if header is None:
+        loaded = [data.header for _, data, error, _ in results if error is None]
+        if loaded:
+            common = Counter(frozenset(columns) for columns in loaded).most_common(1)[0][0]
+            header = next(columns for columns in loaded if frozenset(columns) == common)
+
+    parts = []
+    errors = []
+    for path, data, error, file_report in results:
+        if error is None:
+            try:
+                _check_schema(header, data)
+            except ValueError as schema_error:
+                error = schema_error
+        if error is not None:
+            errors.append((path, error))
+            continue
+        parts.append(data)
+        if report is not None:
+            report.merge(file_report, f'{os.path.basename(path)}: ' if len(paths) > 1 else '')
+
+    if header is None:
+        return read_csv.ColumnarData([], {}), errors
+    if len(parts) == 1 and parts[0].header == header:
+        return parts[0], errors  # Un solo archivo: sin copias (se conserva la caché mapeada)
+    return _merge(header, parts), errors
+
+
+if __name__ == '__main__':
+    report = ErrorReport()
+    data, errors = load_csv_files(sys.argv[1] if len(sys.argv) > 1 else './app/*.csv', report=report)
+    print(len(data), 'filas')
+    for path, error in errors:
+        print(path, error)
+    if report:
+        print(report)
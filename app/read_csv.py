@@ -1,18 +1,215 @@
 import csv
+import itertools
+import sys
+from array import array
+from collections.abc import Mapping
 
-def read_csv(path):
+import instrument
+import validation
+
+CHUNK_ROWS = 4096
+
+@instrument.timed('read_csv')
+def read_csv(path, columnar=False, report=None, coerce=None):
+    if columnar:
+        return read_csv_columns(path, report, coerce)
+    return list(iter_csv(path))
+
+
+def iter_csv(path, columns=None, where=None):
+    """
+    Recorre el CSV fila a fila sin guardarlo en memoria.
+
+    columns limita las claves de cada diccionario a las columnas pedidas.
+    where es un diccionario {columna: valor} que se evalúa sobre el texto
+    crudo de la celda antes de construir la fila; el valor puede ser una
+    cadena (igualdad) o una función que recibe la cadena y devuelve bool.
+    """
     with open(path, 'r') as csvfile:
         reader = csv.reader(csvfile, delimiter=',')
         header = next(reader)
-        data = []
+        if columns is None:
+            columns = header
+        projection = [(key, header.index(key)) for key in columns]
+        filters = []
+        for key, expected in (where or {}).items():
+            if callable(expected):
+                filters.append((header.index(key), expected))
+            else:
+                filters.append((header.index(key), lambda value, expected=expected: value == expected))
         for row in reader:
-            iterable = zip(header,row)
-            country_dict = {key: value for key, value in iterable}
-            data.append(country_dict)
-        return data
+            if len(row) < len(header):
+                row = row + [''] * (len(header) - len(row))
+            if all(check(row[position]) for position, check in filters):
+                yield {key: row[position] for key, position in projection}
+
+
+def _to_text(value):
+    # Texto de un valor numérico (para unir columnas numéricas y de texto en multi_load)
+    if value != value:
+        return ''
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _iter_chunks(reader, width):
+    # Bloques de CHUNK_ROWS filas completadas (o recortadas) al ancho de los encabezados
+    while True:
+        chunk = [row if len(row) == width else (row + [''] * width)[:width]
+                 for row in itertools.islice(reader, CHUNK_ROWS)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def read_csv_columns(path, report=None, coerce=None):
+    """
+    Lee el CSV por columnas: los campos numéricos se guardan en array('d')
+    y los de texto como listas de cadenas internadas (sys.intern), de modo
+    que valores repetidos como 'Asia' comparten un único objeto en memoria.
+
+    Las filas se leen en bloques de CHUNK_ROWS y cada columna del bloque se
+    clasifica de una vez con validation.classify. Por defecto una columna es
+    numérica solo si todas sus celdas no vacías son números (las vacías se
+    guardan como NaN). Con coerce=True (por defecto si se pasa report) basta
+    con que lo sea la mayoría: las celdas no numéricas también se guardan
+    como NaN y se registran en report (ErrorReport).
+
+    Si una columna pasa a ser de texto después de haber leído bloques como
+    números, esas filas se vuelven a leer del archivo para conservar el
+    texto original ("007", "1e3").
+    """
+    if coerce is None:
+        coerce = report is not None
+    with open(path, 'r') as csvfile:
+        reader = csv.reader(csvfile, delimiter=',')
+        header = next(reader)
+        width = len(header)
+        columns = [array('d') for _ in header]
+        numeric = [True] * width
+        filled = [0] * width  # Celdas no vacías de cada columna numérica
+        invalid = [{} for _ in header]  # Celdas no numéricas de cada columna numérica: {fila: texto}
+        reread = {}  # Columnas que pasaron a texto: posición -> filas leídas antes como números
+        rows = 0
+        for chunk in _iter_chunks(reader, width):
+            for position, cells in enumerate(zip(*chunk)):
+                column = columns[position]
+                if not numeric[position]:
+                    column.extend(map(sys.intern, cells))
+                    continue
+                empty = cells.count('')
+                filled[position] += len(cells) - empty
+                if coerce:
+                    # Celdas no numéricas que convierten la columna en texto (la mayoría de las no
+                    # vacías): al encontrar ese número la clasificación se detiene
+                    needed = filled[position] // 2 + 1 - len(invalid[position])
+                else:
+                    needed = 1  # Sin coerce, una sola celda no numérica la convierte en texto
+                positions, numbers = validation.classify(cells, max(needed, 0) + empty)
+                if numbers is None:
+                    bad = [index for index in positions if cells[index]]
+                    if len(bad) >= needed:
+                        # La columna es de texto; las filas de bloques anteriores se recuperan al final
+                        if rows:
+                            reread[position] = rows
+                        column = [''] * rows
+                        column.extend(map(sys.intern, cells))
+                        columns[position] = column
+                        numeric[position] = False
+                        invalid[position] = {}
+                        continue
+                    for index in bad:
+                        invalid[position][rows + index] = cells[index]
+                    cells = list(cells)
+                    for index in positions:
+                        cells[index] = 'nan'  # Vacías y no numéricas se guardan como NaN
+                    numbers = map(float, cells)
+                column.extend(numbers)
+            rows += len(chunk)
+
+    if reread:
+        # Segunda lectura, solo de las filas iniciales de las columnas que pasaron a texto
+        with open(path, 'r') as csvfile:
+            reader = csv.reader(csvfile, delimiter=',')
+            next(reader)
+            row = 0
+            for chunk in _iter_chunks(reader, width):
+                for position, count in reread.items():
+                    part = chunk[:max(count - row, 0)]
+                    columns[position][row:row + len(part)] = [sys.intern(cells[position]) for cells in part]
+                row += len(chunk)
+                if row >= max(reread.values()):
+                    break
+
+    if report is not None:
+        for name, cells in zip(header, invalid):
+            # Las filas del archivo empiezan en 2 (la 1 son los encabezados)
+            report.add(name, len(cells), ((index + 2, value) for index, value in
+                                          itertools.islice(cells.items(), report.max_samples)))
+    return ColumnarData(header, dict(zip(header, columns)))
+
+
+class ColumnarData:
+    """
+    Conjunto de datos guardado por columnas. Se comporta como la lista de
+    diccionarios de read_csv: len(), indexado e iteración devuelven vistas
+    de fila (RowView) que se leen como un diccionario.
+    """
+
+    def __init__(self, header, columns):
+        self.header = list(header)
+        self.columns = columns
+        self._size = len(columns[self.header[0]]) if self.header else 0
+        self.version = 0  # Aumenta en cada escritura; los índices (utils.RowIndex) lo comparan
+
+    def column(self, name):
+        return self.columns[name]
+
+    def set(self, index, name, value):
+        """Cambia una celda e incrementa version para invalidar los índices."""
+        self.columns[name][index] = value
+        self.version += 1
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [RowView(self, i) for i in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError('row index out of range')
+        return RowView(self, index)
+
+    def __iter__(self):
+        for index in range(self._size):
+            yield RowView(self, index)
+
+
+class RowView(Mapping):
+    """Vista de solo lectura de una fila de ColumnarData."""
+
+    __slots__ = ('_data', '_index')
+
+    def __init__(self, data, index):
+        self._data = data
+        self._index = index
+
+    def __getitem__(self, key):
+        return self._data.columns[key][self._index]
+
+    def __iter__(self):
+        return iter(self._data.header)
+
+    def __len__(self):
+        return len(self._data.header)
+
+    def __repr__(self):
+        return repr(dict(self))
 
 
 if __name__ == '__main__':
     data = read_csv('./app/data.csv')
     print(data[0])
-    
\ No newline at end of file
@@ -1,3 +1,11 @@
+from array import array
+
+import numpy as np
+
+import instrument
+
+
+@instrument.timed('get_population')
 def get_population(country_dict):
     population_dict = {
         '2022': float(country_dict['2022 Population']),
@@ -15,6 +23,172 @@ def get_population(country_dict):
         
     return labels, values
 
+@instrument.timed('population_by_country')
 def population_by_country(data, country):
-    result = list(filter(lambda item: item['Country/Territory'] == country, data))
-    return result
\ No newline at end of file
+    result = get_index(data).lookup(country)
+    return result
+
+COUNTRY_COLUMN = 'Country/Territory'
+POPULATION_COLUMNS = [
+    '2022 Population', '2020 Population', '2015 Population', '2010 Population',
+    '2000 Population', '1990 Population', '1980 Population', '1970 Population',
+]
+
+
+def _column_values(data, column):
+    if hasattr(data, 'column'):
+        return data.column(column)
+    if hasattr(data, 'iloc'):
+        return data[column].tolist()
+    return [item[column] for item in data]
+
+
+def _data_version(data):
+    # ColumnarData incrementa version en cada escritura (ColumnarData.set); para
+    # listas y DataFrames solo se detectan filas añadidas o quitadas
+    return len(data), getattr(data, 'version', None)
+
+
+class RowIndex:
+    """
+    Índice hash {valor: [posiciones]} sobre una o varias columnas (por
+    ejemplo el país y, opcionalmente, 'CCA3' y 'Capital'). Se construye una
+    vez y se reconstruye cuando cambia la versión de los datos: con
+    ColumnarData, cualquier escritura hecha con ColumnarData.set; con la
+    lista de diccionarios de read_csv o un DataFrame, solo un cambio de
+    tamaño, así que tras editar celdas en su sitio hay que llamar a
+    refresh (o a invalidate_index).
+    """
+
+    def __init__(self, data, columns=(COUNTRY_COLUMN,)):
+        self.columns = tuple(columns)
+        self.refresh(data)
+
+    def refresh(self, data=None):
+        if data is not None:
+            self.data = data
+        self._positions = {}
+        for column in self.columns:
+            positions = {}
+            for position, key in enumerate(_column_values(self.data, column)):
+                positions.setdefault(key, []).append(position)
+            self._positions[column] = positions
+        self._version = _data_version(self.data)
+
+    def positions(self, key, column=None):
+        if _data_version(self.data) != self._version:
+            self.refresh()
+        return self._positions[column or self.columns[0]].get(key, [])
+
+    def lookup(self, key, column=None):
+        positions = self.positions(key, column)
+        if hasattr(self.data, 'iloc'):
+            return self.data.iloc[positions]
+        return [self.data[position] for position in positions]
+
+
+_last_index = None
+
+
+def get_index(data, columns=(COUNTRY_COLUMN,)):
+    global _last_index
+    columns = tuple(columns)
+    if _last_index is None or _last_index.data is not data or _last_index.columns != columns:
+        _last_index = RowIndex(data, columns)
+    return _last_index
+
+
+def invalidate_index(data=None):
+    # Descarta el índice guardado (solo el de data si se indica) tras editar los datos en su sitio
+    global _last_index
+    if data is None or (_last_index is not None and _last_index.data is data):
+        _last_index = None
+
+
+def _rows(data, positions):
+    if hasattr(data, 'iloc'):
+        return data.iloc[list(positions)]
+    return [data[position] for position in positions]
+
+
+def _numeric(data, column):
+    # Columna como vector float64; las columnas de ColumnarData se leen sin copiar
+    values = _column_values(data, column)
+    if isinstance(values, (array, memoryview)):
+        return np.frombuffer(values, dtype=np.float64)
+    return np.array([float(value) if value != '' else np.nan for value in values], dtype=np.float64)
+
+
+def _codes(data, column):
+    # Devuelve (valores distintos, código de cada fila) de una columna de texto
+    values = _column_values(data, column)
+    if hasattr(values, 'codes'):
+        return values.values, np.frombuffer(values.codes, dtype=np.int32)
+    keys = {}
+    codes = np.fromiter((keys.setdefault(value, len(keys)) for value in values),
+                        dtype=np.intp, count=len(values))
+    return list(keys), codes
+
+
+class GroupBy:
+    """
+    Agrupación por los valores de una columna (por ejemplo 'Continent').
+    Los códigos de grupo se calculan una vez y cada agregación es una sola
+    pasada con np.bincount por columna.
+    """
+
+    def __init__(self, data, column):
+        self.data = data
+        self.column = column
+        self.keys, self.codes = _codes(data, column)
+
+    def count(self):
+        counts = np.bincount(self.codes, minlength=len(self.keys))
+        return dict(zip(self.keys, counts.tolist()))
+
+    def sum(self, columns=None):
+        # {grupo: {columna: total}}; las celdas vacías (NaN) no suman
+        columns = POPULATION_COLUMNS if columns is None else columns
+        totals = {}
+        for column in columns:
+            values = _numeric(self.data, column)
+            values = np.where(np.isnan(values), 0.0, values)
+            totals[column] = np.bincount(self.codes, weights=values, minlength=len(self.keys))
+        return {key: {column: float(totals[column][code]) for column in columns}
+                for code, key in enumerate(self.keys)}
+
+    def mean(self, columns=None):
+        columns = POPULATION_COLUMNS if columns is None else columns
+        means = {}
+        for column in columns:
+            values = _numeric(self.data, column)
+            present = ~np.isnan(values)
+            sums = np.bincount(self.codes, weights=np.where(present, values, 0.0), minlength=len(self.keys))
+            counts = np.bincount(self.codes, weights=present, minlength=len(self.keys))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means[column] = sums / counts
+        return {key: {column: float(means[column][code]) for column in columns}
+                for code, key in enumerate(self.keys)}
+
+
+def group_by(data, column):
+    return GroupBy(data, column)
+
+
+def top_n(data, column, n=10, largest=True):
+    # Las n filas con mayor (o menor) valor en la columna, ordenadas; se ignoran las vacías
+    values = _numeric(data, column)
+    positions = np.flatnonzero(~np.isnan(values))
+    keys = -values[positions] if largest else values[positions]
+    if n < len(positions):
+        selected = np.argpartition(keys, n)[:n]
+        positions, keys = positions[selected], keys[selected]
+    order = np.argsort(keys, kind='stable')
+    return _rows(data, positions[order].tolist())
+
+
+def quantiles(data, column, q=(0.25, 0.5, 0.75)):
+    # {cuantil: valor} de la columna, sin contar las celdas vacías
+    values = _numeric(data, column)
+    results = np.nanquantile(values, q) if len(values) else [np.nan] * len(q)
+    return dict(zip(q, (float(value) for value in results)))
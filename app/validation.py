@@ -0,0 +1,152 @@
+import re  # Expresión regular que reconoce los números sin lanzar excepciones
+
+# La gramática de float() para texto ASCII: decimales con signo, parte decimal y
+# exponente opcionales, guiones bajos entre dígitos ("12", "-3.5", "1e6", " .5 ",
+# "1_000") y los valores especiales inf/infinity/nan. Los dígitos que no son ASCII
+# ("²", "١٢") no se aceptan, aunque float() convierta algunos de ellos.
+_DIGITS = r'[0-9]+(?:_[0-9]+)*'
+_SPACE = r'[ \t\r\f\v]*'  # Espacios que float() ignora, salvo el salto de línea
+_NUMBER = (rf'{_SPACE}[+-]?(?:(?:{_DIGITS}(?:\.(?:{_DIGITS})?)?|\.{_DIGITS})(?:[eE][+-]?{_DIGITS})?'
+           rf'|(?i:inf|infinity|nan)){_SPACE}')
+NUMBER_PATTERN = re.compile(_NUMBER)
+# Líneas que no son un número, para buscarlas todas de una vez en las celdas unidas con '\n'
+_INVALID_LINE = re.compile(rf'^(?!{_NUMBER}$).*$', re.MULTILINE)
+
+
+class ErrorReport:
+    """
+    Resumen compacto de las celdas no válidas de un archivo: cuántas hay en
+    cada columna y las primeras muestras (fila y valor) para poder revisarlas.
+
+    Sustituye al aviso impreso por cada celda: los cargadores registran aquí
+    los errores y al final se muestra un único resumen con print(informe).
+    """
+
+    def __init__(self, max_samples=5):
+        self.max_samples = max_samples
+        self.counts = {}  # columna -> número de celdas no válidas
+        self.samples = {}  # columna -> [(fila, valor), ...] (como mucho max_samples)
+
+    def add(self, column, count, samples=()):
+        """Registra count celdas no válidas de la columna con algunas muestras (fila, valor)."""
+        if not count:
+            return
+        self.counts[column] = self.counts.get(column, 0) + int(count)
+        stored = self.samples.setdefault(column, [])
+        for sample in samples:
+            if len(stored) >= self.max_samples:
+                break
+            stored.append(sample)
+
+    def merge(self, other, prefix=''):
+        # prefix distingue columnas de varios archivos (por ejemplo 'norte.csv: ')
+        for column, count in other.counts.items():
+            self.add(prefix + column, count, other.samples.get(column, ()))
+        return self
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def __bool__(self):
+        return bool(self.counts)
+
+    def to_dict(self):
+        return {column: {'count': count, 'samples': self.samples.get(column, [])}
+                for column, count in self.counts.items()}
+
+    def __str__(self):
+        if not self.counts:
+            return "Sin valores no válidos."
+        lines = [f"{self.total} valores no válidos:"]
+        for column, count in self.counts.items():
+            samples = ', '.join(f"fila {row}: {value!r}" for row, value in self.samples.get(column, []))
+            lines.append(f"  {column}: {count} (por ejemplo {samples})")
+        return '\n'.join(lines)
+
+
+def find_invalid(values):
+    """
+    Devuelve las posiciones de las celdas que no son números según
+    NUMBER_PATTERN, clasificándolas todas de una vez (ver classify).
+    """
+    return classify(values)[0]
+
+
+def classify(values, limit=None):
+    """
+    Devuelve (posiciones no válidas, números), donde números es la lista ya
+    convertida si todas las celdas son válidas y None si no. Las celdas se
+    unen con '\\n': si el texto es ASCII, float() sobre la lista completa
+    acepta justo lo que acepta NUMBER_PATTERN; si no, _INVALID_LINE encuentra
+    todas las líneas no válidas en una sola búsqueda. Con limit la búsqueda
+    se detiene al encontrar limit celdas no válidas.
+    """
+    text = '\n'.join(values)
+    if text.count('\n') != max(len(values) - 1, 0):
+        # Alguna celda contiene un salto de línea: se clasifica celda a celda
+        fullmatch = NUMBER_PATTERN.fullmatch
+        return [position for position, value in enumerate(values) if not fullmatch(value)], None
+    if text.isascii():
+        try:
+            return [], list(map(float, values))
+        except ValueError:
+            pass  # Hay celdas no numéricas: una sola excepción para toda la lista
+    invalid = []
+    line = start = 0
+    for match in _INVALID_LINE.finditer(text):
+        line += text.count('\n', start, match.start())
+        start = match.start()
+        invalid.append(line)
+        if len(invalid) == limit:
+            break
+    return invalid, None
+
+
+def parse_numbers(values, column, report, first_row=1, default=float('nan')):
+    """
+    Convierte una lista de cadenas a números sin una excepción por celda.
+    Todas las celdas se clasifican de una vez con NUMBER_PATTERN; las no
+    válidas se sustituyen por default y se registran en el informe
+    (first_row es el número de la primera fila, para que las muestras
+    indiquen la fila del archivo).
+    """
+    invalid, numbers = classify(values)
+    if numbers is not None:
+        return numbers
+    cells = list(values)
+    for position in invalid:
+        cells[position] = 'nan'
+    numbers = list(map(float, cells))
+    for position in invalid:
+        numbers[position] = default
+    report.add(column, len(invalid),
+               ((first_row + position, values[position]) for position in invalid[:report.max_samples]))
+    return numbers
+
+
+def validate_frame(df, columns, report):
+    """
+    Convierte a números las columnas indicadas de un DataFrame con
+    pd.to_numeric(errors='coerce'), que trabaja sobre la columna completa.
+    Las celdas con texto que no era un número quedan como NaN y se
+    registran en el informe; las vacías se consideran datos faltantes.
+    Devuelve el DataFrame con las columnas ya numéricas.
+    """
+    import pandas as pd  # Solo se necesita con DataFrames (read_csv no carga pandas)
+    converted = {}
+    for column in columns:
+        original = df[column]
+        if original.dtype.kind in 'biuf':
+            continue  # pandas ya la leyó como numérica: no hay nada que validar
+        numeric = pd.to_numeric(original, errors='coerce')
+        invalid = numeric.isna() & original.notna()
+        count = int(invalid.sum())
+        if count:
+            # Las muestras usan el número de fila del archivo (encabezados en la fila 1)
+            examples = original[invalid].head(report.max_samples)
+            report.add(column, count, ((int(index) + 2, value) for index, value in examples.items()))
+        converted[column] = numeric
+    if not converted:
+        return df
+    return df.assign(**converted)
@@ -1,24 +1,226 @@
 # Importamos las bibliotecas necesarias
-from flask import Flask, render_template, jsonify  # Flask para crear la aplicación web, render_template para renderizar HTML, jsonify para respuestas JSON
-import random  # Módulo para generar números aleatorios
+from flask import Flask, render_template, jsonify, Response, request, stream_with_context, url_for, abort  # Flask para crear la aplicación web, render_template para renderizar HTML, jsonify para respuestas JSON, Response y stream_with_context para respuestas en streaming, url_for para rutas de archivos estáticos, abort para responder con un error HTTP
+import atexit  # Módulo para cerrar el registro de muestras al terminar el proceso
+import gzip  # Módulo para comprimir la página una sola vez
+import hashlib  # Módulo para calcular el ETag (huella) de la página
+import json  # Módulo para convertir diccionarios a texto JSON dentro del stream
+import os  # Módulo para trabajar con rutas y fechas de modificación de archivos
+import sys  # Módulo para añadir la carpeta 'app' a las rutas de importación
+import threading  # Módulo para arrancar el hilo productor una sola vez
 import time  # Módulo para trabajar con marcas de tiempo
+import urllib.request  # Módulo para descargar Chart.js al guardarlo localmente
+from sample_buffer import SampleBuffer  # Búfer circular con las muestras recientes
+
+# Módulo de instrumentación del paquete 'app' (tiempos por etapa; se activa con APP_METRICS=1)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+import instrument
+from line_log import BatchWriter  # Escritor de líneas por lotes para el registro de muestras
+from sources import Producer, make_source  # Fuentes de datos y el hilo que las lee (usa instrument)
+
+try:
+    import brotli  # Compresión brotli opcional (pip install brotli)
+except ImportError:
+    brotli = None
 
 # Creamos una instancia de la aplicación Flask
 app = Flask(__name__)  # '__name__' indica el nombre del módulo actual, usado por Flask para localizar recursos como plantillas y archivos estáticos
+# Perfiles con cProfile bajo demanda: con APP_PROFILE_DIR=carpeta, cada petición con '?profile=1'
+# (por ejemplo /get_random_data?n=100&profile=1) o con la cabecera 'X-Profile: 1' se perfila y se
+# guarda en esa carpeta; /stream no se puede perfilar así
+if os.environ.get('APP_PROFILE_DIR'):
+    app.wsgi_app = instrument.ProfileMiddleware(app.wsgi_app, os.environ['APP_PROFILE_DIR'])
+
+SAMPLE_RATE = float(os.environ.get('APPWEB_SAMPLE_RATE', 1.0))  # Muestras por segundo (APPWEB_SAMPLE_RATE=50 para 50 Hz)
+if not 0 < SAMPLE_RATE < float('inf'):  # También descarta 'nan', que no cumple ninguna comparación
+    raise ValueError(f'APPWEB_SAMPLE_RATE debe ser un número mayor que 0: {SAMPLE_RATE!r}')
+SAMPLE_INTERVAL = 1.0 / SAMPLE_RATE  # Segundos entre muestras
+WINDOW_SIZE = int(os.environ.get('APPWEB_WINDOW', 20))  # Puntos visibles en el gráfico del navegador
+STREAM_FLUSH = max(SAMPLE_INTERVAL, 0.05)  # El stream envía como mucho 20 lotes por segundo
+samples = SampleBuffer(max(int(3600 * SAMPLE_RATE), WINDOW_SIZE))  # Guarda la última hora de muestras (o la ventana completa si es mayor)
+# Fuente de las muestras: 'random' (valores aleatorios), 'tail' (filas nuevas de un CSV) o 'replay' (CSV a SAMPLE_RATE)
+# Ejemplo: APPWEB_SOURCE=replay APPWEB_SOURCE_COLUMN='2022 Population' python app.py
+SOURCE = os.environ.get('APPWEB_SOURCE', 'random')
+SOURCE_PATH = os.environ.get('APPWEB_SOURCE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'data.csv'))
+SOURCE_COLUMN = os.environ.get('APPWEB_SOURCE_COLUMN', '2022 Population')  # Columna numérica del CSV
+# Archivo donde se añaden todas las muestras como "timestamp,valor" (APPWEB_LOG=muestras.csv); vacío para no guardarlas
+SAMPLES_LOG = os.environ.get('APPWEB_LOG', '')
+producer = None  # Hilo que lee la fuente y llena el búfer (se arranca en la primera petición de datos)
+producer_lock = threading.Lock()  # Candado para arrancar el productor una sola vez
+
+CHARTJS_VERSION = '3.9.1'  # Versión de Chart.js usada por la página
+CHARTJS_CDN = f'https://cdnjs.cloudflare.com/ajax/libs/Chart.js/{CHARTJS_VERSION}/chart.min.js'  # Copia pública en un CDN
+CHARTJS_VENDOR = f'vendor/chart-{CHARTJS_VERSION}.min.js'  # Copia local dentro de la carpeta 'static'
+# Usa la copia local si existe; APPWEB_LOCAL_CHARTJS=0 obliga a usar el CDN
+USE_LOCAL_CHARTJS = os.environ.get('APPWEB_LOCAL_CHARTJS', '1') != '0'
+index_page = None  # Página principal ya renderizada y comprimida (se crea en la primera visita)
+
+# Función auxiliar que arranca el hilo productor si aún no existe
+# Se arranca en la primera petición y no al importar (serve.py usa un único proceso: el búfer y el productor
+# viven en su memoria, y varios procesos tendrían series distintas)
+def start_producer():
+    global producer
+    if producer is not None:
+        return
+    with producer_lock:
+        if producer is None:
+            # Las muestras se escriben por lotes (como mucho un lote por segundo) en modo append
+            log = None
+            if SAMPLES_LOG:
+                log = BatchWriter(SAMPLES_LOG, batch_size=max(int(SAMPLE_RATE), 1))
+                atexit.register(log.close)  # Escribe el último lote pendiente al salir
+            thread = Producer(make_source(SOURCE, SOURCE_PATH, SOURCE_COLUMN, SAMPLE_RATE), samples, STREAM_FLUSH, log)
+            try:
+                thread.poll()  # Primera lectura inmediata: la petición que lo arranca ya encuentra datos
+            except Exception as error:
+                # Fuente aún no disponible (archivo inexistente, columna mal escrita...): la petición
+                # responde sin datos y el hilo productor sigue reintentando
+                print(f'Error al leer la fuente de datos: {type(error).__name__}: {error}', file=sys.stderr)
+            thread.start()
+            producer = thread
+
+# Función auxiliar que lee un parámetro numérico de la URL ('?n=10') con el tipo indicado (int o float)
+# Si falta o está vacío devuelve 'default'; si no es un número responde 400 en lugar de fallar con un error 500
+def number_arg(name, kind, default=None):
+    if not request.args.get(name):
+        return default
+    value = request.args.get(name, type=kind)
+    if value is None or value != value:  # value != value descarta 'nan'
+        abort(400, description=f"El parámetro '{name}' debe ser un número")
+    return value
+
+# Función auxiliar que convierte listas de marcas de tiempo y valores en JSON compacto por columnas
+def samples_json(timestamps, values):
+    return {'timestamps': timestamps, 'values': values}
+
+# Función auxiliar que renderiza la página principal una sola vez y guarda sus versiones comprimidas
+def build_index_page():
+    template_path = os.path.join(app.root_path, app.template_folder, 'index.html')
+    vendor_path = os.path.join(app.static_folder, CHARTJS_VENDOR)
+    # La página es estática: solo cambia la dirección de Chart.js (local o CDN)
+    if USE_LOCAL_CHARTJS and os.path.isfile(vendor_path):
+        chartjs_url = url_for('static', filename=CHARTJS_VENDOR)
+    else:
+        chartjs_url = CHARTJS_CDN
+    body = render_template('index.html', chartjs_url=chartjs_url, max_points=WINDOW_SIZE,
+                           sample_interval_ms=round(SAMPLE_INTERVAL * 1000, 3),
+                           y_max=100 if SOURCE == 'random' else None).encode('utf-8')  # Los datos reales no tienen máximo fijo
+    return {
+        'mtime': os.path.getmtime(template_path),  # Fecha de la plantilla, para Last-Modified
+        'etag': hashlib.sha1(body).hexdigest(),  # Huella del contenido, para If-None-Match
+        'identity': body,  # Página sin comprimir
+        'gzip': gzip.compress(body, 9),  # Página comprimida con gzip (nivel máximo, solo se hace una vez)
+        'br': brotli.compress(body) if brotli else None,  # Página comprimida con brotli si está disponible
+        'template_path': template_path,
+    }
+
+# Función auxiliar que devuelve la página en caché (en modo depuración se regenera si cambia la plantilla)
+def get_index_page():
+    global index_page
+    if index_page is None or (app.debug and os.path.getmtime(index_page['template_path']) != index_page['mtime']):
+        index_page = build_index_page()
+    return index_page
 
 # Definimos la ruta principal de la aplicación
 @app.route('/')  # Decorador que asocia esta función con la URL raíz ('/')
 def index():
-    # Renderiza y devuelve el archivo 'index.html' ubicado en la carpeta 'templates'
-    return render_template('index.html')
+    # Devuelve el archivo 'index.html' ya renderizado y comprimido en memoria
+    page = get_index_page()
+    # Elige la mejor codificación que acepta el navegador
+    encoding = 'identity'
+    if page['br'] and 'br' in request.accept_encodings:
+        encoding = 'br'
+    elif 'gzip' in request.accept_encodings:
+        encoding = 'gzip'
+    response = Response(page[encoding], mimetype='text/html')
+    if encoding != 'identity':
+        response.content_encoding = encoding
+    response.vary.add('Accept-Encoding')  # Las cachés intermedias deben distinguir por codificación
+    response.set_etag(page['etag'])
+    response.last_modified = page['mtime']
+    response.cache_control.no_cache = True  # El navegador puede guardarla pero debe revalidarla (respuesta 304)
+    # make_conditional responde 304 sin cuerpo si el navegador ya tiene esta versión
+    return response.make_conditional(request)
+
+# Los archivos de 'static/vendor' llevan la versión en el nombre: se pueden guardar un año sin revalidar
+@app.after_request
+def vendor_cache_headers(response):
+    if request.path.startswith('/static/vendor/'):
+        response.cache_control.no_cache = None  # Quita el 'no-cache' que Flask pone por defecto
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    return response
+
+# Comando para guardar Chart.js en 'static/vendor' y servirlo sin depender del CDN:
+# flask --app app vendor-chartjs (ejecutado dentro de la carpeta appweb)
+@app.cli.command('vendor-chartjs')
+def vendor_chartjs():
+    vendor_path = os.path.join(app.static_folder, CHARTJS_VENDOR)
+    os.makedirs(os.path.dirname(vendor_path), exist_ok=True)
+    urllib.request.urlretrieve(CHARTJS_CDN, vendor_path)
+    print(f'Chart.js {CHARTJS_VERSION} guardado en {vendor_path}')
 
 # Definimos una ruta para obtener datos aleatorios
 @app.route('/get_random_data')  # Decorador que asocia esta función con la URL '/get_random_data'
+@instrument.timed('appweb.get_random_data')  # Tiempo de cada petición (si la instrumentación está activa)
 def get_random_data():
-    # Genera un número aleatorio de tipo float entre 0 y 100, redondeado a 2 decimales
-    random_value = round(random.uniform(0, 100), 2)
-    # Devuelve una respuesta JSON con el número aleatorio ('value') y la marca de tiempo actual ('timestamp')
-    return jsonify({'value': random_value, 'timestamp': time.time()})
+    # Cada petición solo lee el búfer compartido; las muestras las genera el hilo productor
+    start_producer()
+    # '?since=<timestamp>' devuelve todas las muestras posteriores a esa marca de tiempo
+    since = number_arg('since', float)
+    if since is not None:
+        return jsonify(samples_json(*samples.since(since)))
+    # '?n=<cantidad>' devuelve las últimas n muestras en una sola respuesta
+    n = number_arg('n', int)
+    if n is not None:
+        return jsonify(samples_json(*samples.last(n)))
+    # Sin parámetros: devuelve una respuesta JSON con la muestra más reciente ('value' y 'timestamp')
+    # (ambos None si la fuente aún no ha producido ninguna, por ejemplo un CSV sin filas nuevas)
+    timestamp, value = samples.latest() or (None, None)
+    return jsonify({'value': value, 'timestamp': timestamp})
+
+# Definimos una ruta que envía las muestras de forma continua (Server-Sent Events)
+@app.route('/stream')  # Una sola conexión abierta sustituye a una petición HTTP por muestra
+def stream():
+    start_producer()
+    # Al reconectar, el navegador envía el id (timestamp) del último evento recibido en
+    # la cabecera 'Last-Event-ID' y se reenvían las muestras que se perdió;
+    # '?since=<timestamp>' permite empezar justo después de un histórico ya cargado
+    # Un id que no es un número (cabecera manipulada o de otra versión) se ignora: empieza un stream nuevo
+    last_sent = number_arg('since', float, time.time() - SAMPLE_INTERVAL)
+    try:
+        last_event = float(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_event = None
+    if last_event is not None and last_event == last_event:  # last_event == last_event descarta 'nan'
+        last_sent = last_event
+    # Segundos entre eventos; se puede cambiar con '/stream?interval=0.5'. Las muestras las genera
+    # el productor a SAMPLE_RATE, así que un intervalo mayor agrupa más muestras en cada evento
+    interval = max(number_arg('interval', float, STREAM_FLUSH), 0.05)
+
+    def event_stream():
+        nonlocal last_sent
+        # Generador que produce un evento SSE ('id: ...', 'data: ...' y una línea en blanco) por lote
+        # de muestras nuevas; a frecuencias altas se agrupan varias muestras en cada evento
+        while True:
+            timestamps, values = samples.since(last_sent)
+            if timestamps:
+                last_sent = timestamps[-1]
+                yield f"id: {last_sent!r}\ndata: {json.dumps(samples_json(timestamps, values))}\n\n"
+            time.sleep(interval)
+
+    # stream_with_context mantiene el contexto de la petición mientras dura el stream
+    # 'no-cache' y 'X-Accel-Buffering' evitan que proxies o navegadores acumulen los eventos
+    return Response(stream_with_context(event_stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Definimos una ruta con los tiempos de cada etapa instrumentada (contadores e histogramas)
+# Formato de texto de Prometheus; '?format=json' devuelve lo mismo como JSON
+@app.route('/metrics')
+def metrics():
+    if request.args.get('format') == 'json':
+        return jsonify(instrument.snapshot())
+    return Response(instrument.prometheus_text(), mimetype='text/plain; version=0.0.4')
 
 # Punto de entrada principal de la aplicación
 if __name__ == '__main__':  # Verifica si el archivo se está ejecutando directamente (no importado como módulo)
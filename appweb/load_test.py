@@ -0,0 +1,255 @@
+# Pruebas de carga para appweb
+#
+# compare (por defecto): compara el sondeo cada segundo (/get_random_data) con el stream SSE (/stream)
+#   python appweb/load_test.py --clients 100 --duration 20
+#   Arranca el servidor en un proceso aparte y mide peticiones por segundo y CPU del servidor (Linux: /proc)
+#
+# latency: latencia p50/p99 de /get_random_data con N clientes concurrentes
+#   python appweb/load_test.py --mode latency --clients 200 --url http://127.0.0.1:8000
+#
+# concurrency: abre conexiones /stream por escalones hasta que fallan y mide el máximo de clientes en vivo
+#   python appweb/load_test.py --mode concurrency --max-clients 5000 --step 250 --url http://127.0.0.1:8000
+#
+# Sin --url, latency y concurrency se ejecutan contra el servidor de desarrollo arrancado en un proceso aparte
+import argparse  # Lectura de opciones de la línea de comandos
+import asyncio  # Miles de clientes simulados en un solo hilo
+import http.client  # Cliente HTTP de bajo nivel para abrir conexiones y leer el stream
+import json  # Lectura de los lotes de muestras del stream
+import os  # Rutas y datos del sistema
+import socket  # Para buscar un puerto libre
+import subprocess  # Para arrancar el servidor en otro proceso
+import sys  # Intérprete de Python actual
+import threading  # Cada cliente simulado es un hilo
+import time  # Medición de tiempos
+from urllib.parse import urlsplit  # Separa host y puerto de --url
+
+APPWEB_DIR = os.path.dirname(os.path.abspath(__file__))  # Carpeta donde está app.py
+
+
+def free_port():
+    # Pide al sistema un puerto libre
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port):
+    # Arranca el servidor de desarrollo con hilos (sin recarga automática ni registro por petición)
+    code = (
+        "import logging; logging.getLogger('werkzeug').setLevel(logging.ERROR)\n"
+        f"from app import app; app.run(port={port}, threaded=True)"
+    )
+    server = subprocess.Popen([sys.executable, '-c', code], cwd=APPWEB_DIR,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # Espera a que el servidor acepte conexiones
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError('El servidor no arrancó')
+
+
+def cpu_seconds(pid):
+    # Tiempo de CPU (usuario + sistema) consumido por un proceso, leído de /proc/<pid>/stat
+    with open(f'/proc/{pid}/stat') as stat:
+        fields = stat.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def polling_client(port, stop, counters):
+    # Simula el diseño anterior: una petición HTTP completa cada segundo
+    while not stop.is_set():
+        started = time.monotonic()
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        try:
+            connection.request('GET', '/get_random_data')
+            connection.getresponse().read()
+            counters['requests'] += 1
+            counters['samples'] += 1
+        except (OSError, http.client.HTTPException):
+            if not stop.is_set():  # Los cortes al apagar el servidor no cuentan como errores
+                counters['errors'] += 1
+        finally:
+            connection.close()
+        stop.wait(max(0.0, 1.0 - (time.monotonic() - started)))
+
+
+def stream_client(port, stop, counters):
+    # Simula el nuevo diseño: una sola conexión por la que llegan todas las muestras
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    try:
+        connection.request('GET', '/stream')
+        response = connection.getresponse()
+        counters['requests'] += 1
+        while not stop.is_set():
+            line = response.fp.readline()
+            if not line:
+                break
+            if line.startswith(b'data:'):
+                # Cada evento trae un lote {'timestamps': [...], 'values': [...]}
+                counters['samples'] += len(json.loads(line[5:])['values'])
+    except (OSError, http.client.HTTPException):
+        if not stop.is_set():
+            counters['errors'] += 1
+    finally:
+        connection.close()
+
+
+def run_mode(mode, clients, duration):
+    # Ejecuta una prueba completa (servidor nuevo) y devuelve sus métricas
+    port = free_port()
+    server = start_server(port)
+    stop = threading.Event()
+    counters = [{'requests': 0, 'samples': 0, 'errors': 0} for _ in range(clients)]
+    target = polling_client if mode == 'polling' else stream_client
+    threads = [threading.Thread(target=target, args=(port, stop, counter), daemon=True) for counter in counters]
+    try:
+        cpu_before = cpu_seconds(server.pid)
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        cpu_used = cpu_seconds(server.pid) - cpu_before
+        stop.set()
+    finally:
+        server.kill()
+        server.wait()
+    totals = {key: sum(counter[key] for counter in counters) for key in counters[0]}
+    return {
+        'mode': mode,
+        'clients': clients,
+        'requests_per_second': totals['requests'] / duration,
+        'samples_per_second': totals['samples'] / duration,
+        'errors': totals['errors'],
+        'server_cpu_ms_per_client_second': cpu_used * 1000 / (clients * duration),
+    }
+
+
+async def http_get(host, port, path):
+    # Petición GET mínima con asyncio; devuelve el cuerpo completo de la respuesta
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n'.encode())
+        await writer.drain()
+        response = await reader.read()
+        if not response.startswith(b'HTTP/1.1 200') and not response.startswith(b'HTTP/1.0 200'):
+            raise OSError(response.split(b'\r\n', 1)[0].decode(errors='replace'))
+        return response
+    finally:
+        writer.close()
+
+
+async def latency_client(host, port, deadline, latencies, errors):
+    # Repite peticiones a /get_random_data sin pausa y guarda la duración de cada una
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            await http_get(host, port, '/get_random_data')
+            latencies.append(time.perf_counter() - started)
+        except OSError:
+            errors.append(1)
+
+
+def percentile(values, fraction):
+    # Percentil por rango más cercano de una lista de números
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else float('nan')
+
+
+async def run_latency(host, port, clients, duration):
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+    await asyncio.gather(*(latency_client(host, port, deadline, latencies, errors) for _ in range(clients)))
+    print(f'{clients} clientes, {len(latencies) / duration:.0f} peticiones/s, {len(errors)} errores')
+    print(f'p50 {percentile(latencies, 0.50) * 1000:.1f} ms   p99 {percentile(latencies, 0.99) * 1000:.1f} ms')
+
+
+async def stream_listener(host, port, last_seen, index):
+    # Mantiene abierta una conexión /stream y anota cuándo llegó su último evento
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f'GET /stream HTTP/1.1\r\nHost: {host}\r\n\r\n'.encode())
+        await writer.drain()
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            if line.startswith(b'data:'):
+                last_seen[index] = time.monotonic()
+    finally:
+        writer.close()
+
+
+async def run_concurrency(host, port, max_clients, step, hold):
+    # Añade 'step' clientes cada vez y espera 'hold' segundos; un cliente está en vivo si
+    # recibió un evento en los últimos 3 segundos. Se detiene cuando alguno deja de estarlo.
+    last_seen = {}
+    tasks = []
+    best = 0
+    while len(tasks) < max_clients:
+        for _ in range(step):
+            index = len(tasks)
+            last_seen[index] = None
+            tasks.append(asyncio.ensure_future(stream_listener(host, port, last_seen, index)))
+        await asyncio.sleep(hold)
+        now = time.monotonic()
+        live = sum(1 for seen in last_seen.values() if seen is not None and now - seen < 3)
+        print(f'{len(tasks):>6} conectados, {live:>6} en vivo')
+        if live < len(tasks):
+            break
+        best = live
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    print(f'Máximo de clientes en vivo sin fallos: {best}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pruebas de carga de appweb')
+    parser.add_argument('--mode', choices=['compare', 'latency', 'concurrency'], default='compare')
+    parser.add_argument('--url', help='servidor ya arrancado (por ejemplo http://127.0.0.1:8000)')
+    parser.add_argument('--clients', type=int, default=50, help='clientes simultáneos')
+    parser.add_argument('--duration', type=float, default=10, help='segundos por prueba')
+    parser.add_argument('--max-clients', type=int, default=2000, help='límite de la prueba concurrency')
+    parser.add_argument('--step', type=int, default=200, help='clientes añadidos por escalón')
+    parser.add_argument('--hold', type=float, default=3, help='segundos de espera por escalón')
+    args = parser.parse_args()
+
+    if args.mode == 'compare':
+        print(f"{'modo':<8} {'peticiones/s':>13} {'muestras/s':>11} {'errores':>8} {'CPU ms/cliente/s':>17}")
+        for mode in ('polling', 'stream'):
+            result = run_mode(mode, args.clients, args.duration)
+            print(f"{result['mode']:<8} {result['requests_per_second']:>13.1f} {result['samples_per_second']:>11.1f} "
+                  f"{result['errors']:>8} {result['server_cpu_ms_per_client_second']:>17.2f}")
+        return
+
+    # Cada cliente necesita un descriptor de archivo; se sube el límite al máximo permitido
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ImportError, ValueError, OSError):
+        pass
+
+    server = None
+    if args.url:
+        target = urlsplit(args.url)
+        host, port = target.hostname, target.port or 80
+    else:
+        host, port = '127.0.0.1', free_port()
+        server = start_server(port)
+    try:
+        if args.mode == 'latency':
+            asyncio.run(run_latency(host, port, args.clients, args.duration))
+        else:
+            asyncio.run(run_concurrency(host, port, args.max_clients, args.step, args.hold))
+    finally:
+        if server is not None:
+            server.kill()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# Búfer circular de tamaño fijo para las muestras recientes del servidor
+from array import array  # Arreglos compactos de números (8 bytes por valor, sin objetos de Python)
+from bisect import bisect_right  # Búsqueda binaria para localizar una marca de tiempo
+import threading  # Candado para que varios hilos lean y escriban a la vez sin errores
+
+
+class SampleBuffer:
+    # __slots__ evita el diccionario de atributos de cada instancia
+    __slots__ = ('capacity', '_timestamps', '_values', '_start', '_size', '_lock')
+
+    def __init__(self, capacity):
+        self.capacity = capacity  # Número máximo de muestras guardadas
+        self._timestamps = array('d', bytes(8 * capacity))  # Marcas de tiempo (segundos)
+        self._values = array('d', bytes(8 * capacity))  # Valores de las muestras
+        self._start = 0  # Posición de la muestra más antigua
+        self._size = 0  # Número de muestras guardadas
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def append(self, timestamp, value):
+        # Añade una muestra; si el búfer está lleno se sobrescribe la más antigua
+        with self._lock:
+            self._append(timestamp, value)
+
+    def extend(self, samples):
+        # Añade una lista de (timestamp, valor) con una sola toma del candado
+        with self._lock:
+            for timestamp, value in samples:
+                self._append(timestamp, value)
+
+    def _append(self, timestamp, value):
+        # Guarda una muestra (requiere el candado)
+        position = (self._start + self._size) % self.capacity
+        self._timestamps[position] = timestamp
+        self._values[position] = value
+        if self._size < self.capacity:
+            self._size += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+
+    def latest(self):
+        # Devuelve la muestra más reciente como (timestamp, valor) o None si está vacío
+        with self._lock:
+            if not self._size:
+                return None
+            position = (self._start + self._size - 1) % self.capacity
+            return self._timestamps[position], self._values[position]
+
+    def _slice(self, first, count):
+        # Copia 'count' muestras a partir de la 'first'-ésima más antigua (requiere el candado)
+        start = (self._start + first) % self.capacity
+        end = start + count
+        if end <= self.capacity:
+            return self._timestamps[start:end].tolist(), self._values[start:end].tolist()
+        end -= self.capacity
+        return (self._timestamps[start:].tolist() + self._timestamps[:end].tolist(),
+                self._values[start:].tolist() + self._values[:end].tolist())
+
+    def last(self, n):
+        # Devuelve (timestamps, valores) de las n muestras más recientes, de la más antigua a la más nueva
+        with self._lock:
+            count = max(0, min(n, self._size))
+            return self._slice(self._size - count, count)
+
+    def since(self, timestamp):
+        # Devuelve (timestamps, valores) de las muestras posteriores a 'timestamp'
+        # Las marcas de tiempo están ordenadas, así que se busca con bisect sin recorrer el búfer
+        with self._lock:
+            ordered = _RingView(self._timestamps, self._start, self._size, self.capacity)
+            first = bisect_right(ordered, timestamp)
+            return self._slice(first, self._size - first)
+
+
+class _RingView:
+    # Vista de solo lectura del búfer en orden cronológico, para usarla con bisect
+    __slots__ = ('_data', '_start', '_size', '_capacity')
+
+    def __init__(self, data, start, size, capacity):
+        self._data = data
+        self._start = start
+        self._size = size
+        self._capacity = capacity
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        return self._data[(self._start + index) % self._capacity]
@@ -0,0 +1,74 @@
+# Servidor de producción para appweb: sirve las mismas rutas ('/', '/get_random_data', '/stream')
+# pensado para miles de gráficos en vivo conectados a la vez
+#
+# Uso: python appweb/serve.py --port 8000
+#
+# Si está instalado gevent, cada conexión es una corrutina ligera (miles en un solo proceso).
+# Sin gevent, se usa el servidor de werkzeug con un hilo por conexión (adecuado para cientos de clientes).
+#
+# Siempre es un único proceso: el búfer de muestras y el hilo productor viven en la memoria del
+# proceso, así que con varios procesos cada uno tendría su propia serie y un cliente vería datos
+# distintos según el proceso que atendiera cada petición o reconexión. Para repartir la carga entre
+# varios procesos las muestras tendrían que guardarse fuera (por ejemplo en Redis).
+# Equivalente con gunicorn (también con un solo proceso): gunicorn -k gevent -w 1 --worker-connections 10000 -b :8000 app:app
+import argparse  # Lectura de opciones de la línea de comandos
+import socket  # Socket de escucha
+
+try:
+    # gevent debe parchear la biblioteca estándar (sockets, time.sleep, hilos...) antes
+    # de importar la aplicación, para que las esperas del stream no bloqueen el proceso
+    from gevent import monkey
+    monkey.patch_all()
+    from gevent.pool import Pool
+    from gevent.pywsgi import WSGIServer
+except ImportError:
+    WSGIServer = None
+
+from app import app  # La misma aplicación Flask del servidor de desarrollo
+
+
+def raise_file_limit():
+    # Cada cliente conectado usa un descriptor de archivo; sube el límite al máximo permitido
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+def serve_gevent(listener, max_clients):
+    # Atiende conexiones con corrutinas de gevent, con un máximo de clientes simultáneos
+    WSGIServer(listener, app, spawn=Pool(max_clients), log=None).serve_forever()
+
+
+def serve_threaded(host, port):
+    # Alternativa sin dependencias: un hilo por conexión
+    from werkzeug.serving import make_server
+    make_server(host, port, app, threaded=True).serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor de producción para appweb')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-clients', type=int, default=10000, help='conexiones simultáneas')
+    args = parser.parse_args()
+
+    raise_file_limit()
+
+    if WSGIServer is None:
+        print(f'gevent no está instalado: servidor con hilos en http://{args.host}:{args.port}')
+        serve_threaded(args.host, args.port)
+        return
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((args.host, args.port))
+    listener.listen(4096)
+    print(f'gevent: un proceso en http://{args.host}:{args.port}')
+    serve_gevent(listener, args.max_clients)
+
+
+if __name__ == '__main__':
+    main()
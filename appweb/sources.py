@@ -0,0 +1,198 @@
+# Fuentes de datos para el gráfico en vivo y el hilo productor que las lee
+#
+# Cada fuente devuelve en read() las muestras nuevas como lista de (timestamp, valor).
+# Un único hilo productor llama a read() periódicamente y guarda las muestras en el
+# búfer compartido; las rutas web solo leen de ese búfer, así que el coste por petición
+# no depende de la fuente ni del número de clientes conectados.
+import csv  # Lectura de archivos CSV
+import os  # Tamaño de archivo para detectar si se truncó
+import random  # Valores aleatorios para la fuente de ejemplo
+import sys  # Salida de errores del hilo productor
+import threading  # Hilo productor
+import time  # Marcas de tiempo y pausas
+
+# Módulo de instrumentación del paquete 'app' (tiempos por etapa; se activa con APP_METRICS=1)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+import instrument
+
+
+class DataSource:
+    # Clase base: las fuentes concretas implementan read()
+    def read(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class RandomSource(DataSource):
+    # Genera valores aleatorios entre 0 y 100 a una frecuencia fija (la fuente original)
+    def __init__(self, rate=1.0):
+        self.interval = 1.0 / rate
+        self._next = time.time()  # Marca de tiempo de la próxima muestra
+
+    def read(self):
+        now = time.time()
+        result = []
+        # Genera todas las muestras que tocaban desde la última lectura
+        while self._next <= now:
+            result.append((self._next, round(random.uniform(0, 100), 2)))
+            self._next += self.interval
+        return result
+
+
+def column_index(header, column, path):
+    # Posición de la columna en los encabezados, con un error que indica el archivo y las columnas
+    try:
+        return header.index(column)
+    except ValueError:
+        raise ValueError(f'La columna {column!r} no existe en {path}; columnas: {header}') from None
+
+
+class CsvTailSource(DataSource):
+    # Sigue un CSV al que se le van añadiendo filas (como 'tail -f') y emite la columna indicada
+    # El archivo se abre en la primera lectura: si aún no existe o la columna no está, el error
+    # llega al productor, que lo muestra y vuelve a intentarlo
+    def __init__(self, path, column):
+        self.path = path
+        self.column = column
+        self._file = None
+        self._index = None
+        self._from_end = True  # La primera apertura correcta empieza al final del archivo
+        self._partial = ''  # Última línea aún incompleta
+        self._last = time.time()  # Momento de la lectura anterior
+
+    def _open(self, from_end=True):
+        self.close()
+        self._file = open(self.path, 'r', newline='', encoding='utf-8')
+        header = next(csv.reader([self._file.readline()]), [])
+        try:
+            self._index = column_index(header, self.column, self.path)
+        except ValueError:
+            self.close()
+            raise
+        if from_end:
+            self._file.seek(0, os.SEEK_END)  # Solo interesan las filas que se añadan a partir de ahora
+        self._partial = ''
+
+    def read(self):
+        # Si el archivo se truncó o se reemplazó (rotación de logs), se vuelve a abrir y se
+        # leen sus filas desde el principio; también si una lectura anterior falló
+        if self._file is None:
+            self._open(from_end=self._from_end)
+            self._from_end = False
+        stat = os.stat(self.path)
+        if stat.st_ino != os.fstat(self._file.fileno()).st_ino or stat.st_size < self._file.tell():
+            self._open(from_end=False)
+        text = self._partial + self._file.read()
+        lines = text.split('\n')
+        self._partial = lines.pop()  # Lo que queda tras el último salto de línea está incompleto
+        values = []
+        for row in csv.reader(lines):
+            if len(row) > self._index:
+                try:
+                    values.append(float(row[self._index]))
+                except ValueError:
+                    pass  # Celdas no numéricas: se ignoran
+        # Las filas llegadas desde la lectura anterior se reparten en ese intervalo,
+        # así cada muestra tiene una marca de tiempo distinta y ordenada
+        now = time.time()
+        step = (now - self._last) / len(values) if values else 0
+        result = [(self._last + (i + 1) * step, value) for i, value in enumerate(values)]
+        self._last = now
+        return result
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class CsvReplaySource(DataSource):
+    # Reproduce las filas de un CSV a una frecuencia fija, volviendo a empezar al terminar
+    def __init__(self, path, column, rate=1.0):
+        self.path = path
+        self.column = column
+        self.interval = 1.0 / rate
+        self._rows = None
+        self._next = time.time()
+
+    def _values(self):
+        # Generador infinito con los valores numéricos de la columna
+        while True:
+            found = False
+            with open(self.path, 'r', newline='', encoding='utf-8') as file:
+                reader = csv.reader(file)
+                index = column_index(next(reader, []), self.column, self.path)
+                for row in reader:
+                    try:
+                        value = float(row[index])
+                    except (ValueError, IndexError):
+                        continue
+                    found = True
+                    yield value
+            if not found:
+                return  # La columna no tiene valores numéricos
+
+    def read(self):
+        if self._rows is None:
+            self._rows = self._values()
+        now = time.time()
+        result = []
+        while self._next <= now:
+            try:
+                value = next(self._rows, None)
+            except Exception:
+                self._rows = None  # El generador terminó con el error: la próxima lectura empieza de nuevo
+                raise
+            if value is None:
+                break
+            result.append((self._next, value))
+            self._next += self.interval
+        return result
+
+
+def make_source(kind, path=None, column=None, rate=1.0):
+    # Crea la fuente indicada por su nombre: 'random', 'tail' o 'replay'
+    if kind == 'random':
+        return RandomSource(rate)
+    if kind == 'tail':
+        return CsvTailSource(path, column)
+    if kind == 'replay':
+        return CsvReplaySource(path, column, rate)
+    raise ValueError(f'Fuente de datos desconocida: {kind}')
+
+
+class Producer(threading.Thread):
+    # Hilo que lee la fuente cada 'tick' segundos y guarda las muestras en el búfer
+    # Si se indica 'log' (un BatchWriter de app/line_log.py) las muestras también se
+    # añaden a ese archivo como líneas "timestamp,valor", escritas por lotes
+    MAX_BACKOFF = 30.0  # Segundos máximos de espera entre reintentos tras un error
+    def __init__(self, source, buffer, tick, log=None):
+        super().__init__(daemon=True)  # daemon: no impide que el proceso termine
+        self.source = source
+        self.buffer = buffer
+        self.tick = tick
+        self.log = log
+
+    @instrument.timed('appweb.source_poll')  # Mide cada lectura de la fuente
+    def poll(self):
+        # Todas las muestras de una lectura se guardan a la vez: ningún lector ve un lote a medias
+        batch = self.source.read()
+        self.buffer.extend(batch)
+        if self.log is not None and batch and not self.log.closed:  # Cerrado al terminar el proceso
+            self.log.write_many([f'{timestamp!r},{value!r}' for timestamp, value in batch])
+
+    def run(self):
+        # Un error de la fuente (archivo borrado o rotado, columna inexistente...) no detiene el
+        # hilo: se muestra y se vuelve a intentar, esperando el doble tras cada fallo seguido
+        delay = self.tick
+        while True:
+            time.sleep(delay)
+            try:
+                self.poll()
+            except Exception as error:
+                delay = min(max(delay, self.tick) * 2, self.MAX_BACKOFF)
+                print(f'Error al leer la fuente de datos: {type(error).__name__}: {error}; nuevo intento en {delay:.1f} s', file=sys.stderr)
+            else:
+                delay = self.tick
@@ -0,0 +1,105 @@
+"""
+Compara las agregaciones de app/utils (group_by, top_n, quantiles sobre las
+columnas tipadas de ColumnarData) con los bucles equivalentes sobre la lista
+de diccionarios de read_csv.
+
+Uso: python benchmarks/bench_aggregations.py [filas]
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'app'))
+import read_csv
+import utils
+
+YEARS = utils.POPULATION_COLUMNS
+
+
+def synthetic_csv(path, rows):
+    """Escribe un CSV con el esquema de app/data.csv y filas basadas en las reales."""
+    with open(os.path.join(ROOT, 'app', 'data.csv'), newline='') as source:
+        reader = csv.reader(source)
+        header = next(reader)
+        base = list(reader)
+    numeric = [position for position, name in enumerate(header)
+               if name in YEARS or name in ('Growth Rate', 'Density (per km²)')]
+    rng = random.Random(0)
+    with open(path, 'w', newline='') as target:
+        writer = csv.writer(target)
+        writer.writerow(header)
+        for index in range(rows):
+            row = list(base[index % len(base)])
+            for position in numeric:
+                row[position] = repr(float(row[position]) * rng.uniform(0.5, 1.5))
+            writer.writerow(row)
+
+
+def naive_group_sum(rows, column, years):
+    totals = {}
+    for row in rows:
+        group = totals.setdefault(row[column], {year: 0.0 for year in years})
+        for year in years:
+            group[year] += float(row[year])
+    return totals
+
+
+def naive_top_n(rows, column, n):
+    return sorted(rows, key=lambda row: float(row[column]), reverse=True)[:n]
+
+
+def naive_quantiles(rows, column, q):
+    values = sorted(float(row[column]) for row in rows)
+    result = {}
+    for fraction in q:
+        # Interpolación lineal, igual que np.quantile
+        position = fraction * (len(values) - 1)
+        lower = int(position)
+        upper = min(lower + 1, len(values) - 1)
+        result[fraction] = values[lower] + (values[upper] - values[lower]) * (position - lower)
+    return result
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    q = (0.25, 0.5, 0.75)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'data.csv')
+        synthetic_csv(path, rows)
+        dicts = read_csv.read_csv(path)
+        columnar = read_csv.read_csv(path, columnar=True)
+    print(f'Datos: {rows} filas')
+
+    cases = [
+        ('group_by(Continent).sum', naive_group_sum, (dicts, 'Continent', YEARS),
+         lambda: utils.group_by(columnar, 'Continent').sum(YEARS)),
+        ('top_n(Growth Rate, 10)', naive_top_n, (dicts, 'Growth Rate', 10),
+         lambda: utils.top_n(columnar, 'Growth Rate', 10)),
+        ('quantiles(Density)', naive_quantiles, (dicts, 'Density (per km²)', q),
+         lambda: utils.quantiles(columnar, 'Density (per km²)', q)),
+    ]
+    for name, naive, args, vectorized in cases:
+        before, loop = timed(naive, *args)
+        after, kernel = timed(vectorized)
+        if name.startswith('top_n'):
+            assert [row['Country/Territory'] for row in before] == [row['Country/Territory'] for row in after]
+        elif name.startswith('group_by'):
+            assert all(abs(before[key][year] - after[key][year]) <= 1e-6 * abs(before[key][year])
+                       for key in before for year in YEARS)
+        else:
+            assert all(abs(before[fraction] - after[fraction]) <= 1e-9 * abs(before[fraction]) for fraction in q)
+        print(f'{name:<26} bucle {loop * 1000:9.1f} ms   vectorizado {kernel * 1000:8.1f} ms   x{loop / kernel:.0f}')
+
+
+if __name__ == '__main__':
+    main()
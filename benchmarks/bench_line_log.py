@@ -0,0 +1,142 @@
+"""
+Compara la escritura y lectura de líneas de app/line_log con los patrones de
+024_write.py (file.write por línea) y 023_files.py (for line in file), en
+líneas por segundo.
+
+Uso: python benchmarks/bench_line_log.py [líneas] [hilos]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'app'))
+from line_log import BatchWriter, iter_line_batches
+
+
+def make_lines(count):
+    # Muestras como las de appweb: marca de tiempo y valor
+    start = time.time()
+    return [f'{start + index * 0.02!r},{(index * 7919) % 10007 / 100.0!r}' for index in range(count)]
+
+
+def per_line_write(path, lines):
+    # 024_write.py: una llamada a write por línea sobre el archivo de texto de Python
+    with open(path, 'a') as file:
+        for line in lines:
+            file.write(line + '\n')
+
+
+def per_line_flush(path, lines):
+    # Registro de eventos habitual: cada línea se escribe y se vuelca al sistema
+    with open(path, 'a') as file:
+        for line in lines:
+            file.write(line + '\n')
+            file.flush()
+
+
+def batch_writer(**options):
+    def write(path, lines):
+        with BatchWriter(path, **options) as writer:
+            for line in lines:
+                writer.write(line)
+    return write
+
+
+def batch_writer_many(path, lines):
+    with BatchWriter(path) as writer:
+        for start in range(0, len(lines), 1000):
+            writer.write_many(lines[start:start + 1000])
+
+
+def threaded(write_line, make_writer, threads):
+    # Reparte las líneas entre varios hilos que escriben en el mismo destino
+    def write(path, lines):
+        with make_writer(path) as writer:
+            parts = [lines[index::threads] for index in range(threads)]
+            workers = [threading.Thread(target=lambda part=part: [write_line(writer, line) for line in part])
+                       for part in parts]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+    return write
+
+
+class LockedFile:
+    # Archivo de Python compartido con un candado y flush por línea
+    def __init__(self, path):
+        self.file = open(path, 'a')
+        self.lock = threading.Lock()
+
+    def write(self, line):
+        with self.lock:
+            self.file.write(line + '\n')
+            self.file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.file.close()
+
+
+def read_per_line(path):
+    # 023_files.py sin el print: for line in file
+    count = 0
+    with open(path) as file:
+        for line in file:
+            count += 1
+    return count
+
+
+def read_batches(path):
+    return sum(len(lines) for lines in iter_line_batches(path))
+
+
+def measure(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    count = int(float(sys.argv[1])) if len(sys.argv) > 1 else 1_000_000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    lines = make_lines(count)
+    print(f'{count} líneas, {threads} hilos en los casos concurrentes\n')
+
+    writers = [
+        ('write por línea (024_write.py)', per_line_write),
+        ('write + flush por línea', per_line_flush),
+        ('BatchWriter.write', batch_writer()),
+        ('BatchWriter.write (writev)', batch_writer(vectored=True)),
+        ('BatchWriter.write_many', batch_writer_many),
+        ('BatchWriter fsync=flush', batch_writer(batch_size=10_000, fsync='flush')),
+        (f'{threads} hilos, archivo + candado', threaded(LockedFile.write, LockedFile, threads)),
+        (f'{threads} hilos, BatchWriter', threaded(BatchWriter.write, BatchWriter, threads)),
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'lines.csv')
+        for name, write in writers:
+            _, seconds = measure(write, path, lines)
+            written = read_batches(path)
+            assert written == count, (name, written)
+            if 'hilos' not in name:
+                assert [line for batch in iter_line_batches(path) for line in batch] == lines, name
+            print(f'{name:<34} {count / seconds:>14,.0f} líneas/s')
+            os.remove(path)
+
+        per_line_write(path, lines)
+        print()
+        for name, read in [('for line in file (023_files.py)', read_per_line),
+                           ('iter_line_batches', read_batches)]:
+            read_count, seconds = measure(read, path)
+            assert read_count == count, name
+            print(f'{name:<34} {count / seconds:>14,.0f} líneas/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Compara la latencia por gráfico de la extracción original (filtro booleano y
+bucle por años con iloc/float) con la lectura de una fila de PopulationMatrix.
+
+Uso: python benchmarks/bench_population_matrix.py [entidades] [años]
+"""
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from population_matrix import PopulationMatrix
+
+
+def synthetic_dataset(entities, years):
+    """Genera un DataFrame con una columna de país y columnas 'AAAA Population'."""
+    rng = np.random.default_rng(0)
+    data = {'Country/Territory': [f'Entity {i}' for i in range(entities)]}
+    for year in range(2022 - years + 1, 2023):
+        data[f'{year} Population'] = rng.integers(1_000, 100_000_000, entities)
+    return pd.DataFrame(data)
+
+
+def extract_loop(df, country_column, year_columns, country_name):
+    """Extracción original de testes.plot_country_population / testesweb.update_graph."""
+    country_data = df[df[country_column] == country_name]
+    population_data = {}
+    for year in year_columns:
+        try:
+            year_str = str(year)
+            if not country_data[year_str].empty:
+                population = country_data[year_str].iloc[0]
+                try:
+                    population_data[year_str] = float(population)
+                except (ValueError, TypeError):
+                    pass
+        except KeyError:
+            continue
+    return population_data
+
+
+def extract_matrix(matrix, country_name):
+    years, populations = matrix.series(country_name)
+    return dict(zip(years, populations))
+
+
+def main():
+    entities = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    years = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    requests = 20
+
+    df = synthetic_dataset(entities, years)
+    year_columns = [column for column in df.columns if column[:4].isdigit()]
+    countries = random.Random(0).sample(df['Country/Territory'].tolist(), requests)
+    print(f'Datos: {entities} entidades x {years} años, {requests} peticiones')
+
+    start = time.perf_counter()
+    matrix = PopulationMatrix(df, 'Country/Territory', year_columns)
+    build = time.perf_counter() - start
+    print(f'Construcción de la matriz (una vez): {build * 1000:.1f} ms')
+
+    start = time.perf_counter()
+    for country in countries:
+        before = extract_loop(df, 'Country/Territory', year_columns, country)
+    loop = (time.perf_counter() - start) / requests
+
+    start = time.perf_counter()
+    for country in countries:
+        after = extract_matrix(matrix, country)
+    sliced = (time.perf_counter() - start) / requests
+
+    assert before == after
+    print(f'Antes (filtro + bucle por año): {loop * 1000:.3f} ms por petición')
+    print(f'Después (fila de la matriz):    {sliced * 1000:.3f} ms por petición')
+    print(f'Aceleración: x{loop / sliced:.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,413 @@
+"""
+Banco de pruebas del flujo completo: carga del CSV -> búsqueda -> datos del gráfico.
+
+Genera CSV sintéticos con el esquema de app/data.csv (de 10^3 a 10^7 filas),
+mide cada cargador, las funciones de búsqueda y la preparación de los
+gráficos, y guarda los resultados en JSON para comparar entre ejecuciones.
+Cada caso se ejecuta en un proceso nuevo, así el pico de memoria (ru_maxrss)
+corresponde solo a ese caso. Los casos cuyas dependencias no están
+instaladas (pandas, dash, matplotlib...) se marcan como omitidos.
+
+Uso:
+    python benchmarks/run_suite.py                              # 10^3, 10^4 y 10^5 filas
+    python benchmarks/run_suite.py --sizes 1e3 1e5 1e7 --repeat 3
+    python benchmarks/run_suite.py --cases load --compare benchmarks/results/anterior.json
+"""
+import argparse
+import base64
+import contextlib
+import csv
+import importlib.util
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+LOOKUPS = 1000  # Consultas por caso de búsqueda
+
+CASES = {}
+
+
+def case(name, group, needs=(), max_rows=None):
+    """
+    Registra un caso. La función recibe la ruta del CSV, hace la preparación
+    (que no se mide) y devuelve la función que se mide.
+    """
+    def register(setup):
+        CASES[name] = {'group': group, 'needs': needs, 'max_rows': max_rows, 'setup': setup}
+        return setup
+    return register
+
+
+def _quiet(function, *args):
+    # Los cargadores de ejemplo imprimen cada fila: se descarta la salida
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return function(*args)
+
+
+def _sample_countries(path, count=LOOKUPS):
+    import read_csv
+    names = list(read_csv.iter_csv(path, columns=['Country/Territory']))
+    return [row['Country/Territory'] for row in random.Random(0).choices(names, k=count)]
+
+
+def _remove(path):
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+
+
+# Cargadores
+
+@case('app.read_csv (diccionarios)', 'load')
+def _(path):
+    import read_csv
+    return lambda: read_csv.read_csv(path)
+
+
+@case('app.read_csv (columnar)', 'load')
+def _(path):
+    import read_csv
+    return lambda: read_csv.read_csv(path, columnar=True)
+
+
+@case('app.csv_cache (sin caché)', 'load')
+def _(path):
+    import csv_cache
+    _remove(csv_cache.cache_path(path))
+    return lambda: csv_cache.load(path)
+
+
+@case('app.csv_cache (caché mapeada)', 'load')
+def _(path):
+    import csv_cache
+    csv_cache.load(path)
+    return lambda: csv_cache.load(path)
+
+
+@case('csv_graphics.leer_csv', 'load', max_rows=10 ** 6)
+def _(path):
+    import csv_graphics
+    return lambda: _quiet(csv_graphics.leer_csv, path)
+
+
+@case('csv_graphics.inspeccionar_csv', 'load')
+def _(path):
+    import csv_graphics
+    return lambda: _quiet(csv_graphics.inspeccionar_csv, path)
+
+
+@case('ejerci.leer_csv', 'load', needs=('matplotlib',), max_rows=10 ** 6)
+def _(path):
+    import ejerci
+    return lambda: _quiet(ejerci.leer_csv, path)
+
+
+@case('testes.load_csv_file (sin caché)', 'load', needs=('pandas', 'matplotlib'))
+def _(path):
+    import feather_cache
+    import testes
+    _remove(path + feather_cache.SUFFIX)
+    return lambda: testes.load_csv_file(path)
+
+
+@case('testes.load_csv_file (caché Feather)', 'load', needs=('pandas', 'matplotlib', 'pyarrow'))
+def _(path):
+    import testes
+    testes.load_csv_file(path)
+    return lambda: testes.load_csv_file(path)
+
+
+@case('testesweb.parse_contents', 'load', needs=('pandas', 'dash', 'plotly'))
+def _(path):
+    import testesweb
+    with open(path, 'rb') as source:
+        contents = 'data:text/csv;base64,' + base64.b64encode(source.read()).decode('ascii')
+    return lambda: _quiet(testesweb.parse_contents, contents, os.path.basename(path))
+
+
+# Búsquedas
+
+@case('búsqueda lineal (original, 10 consultas)', 'lookup')
+def _(path):
+    import read_csv
+    data = read_csv.read_csv(path)
+    names = _sample_countries(path, 10)
+    return lambda: [[row for row in data if row['Country/Territory'] == name] for name in names]
+
+
+@case('utils.RowIndex (construcción)', 'lookup', needs=('numpy',))
+def _(path):
+    import read_csv
+    import utils
+    data = read_csv.read_csv(path, columnar=True)
+    return lambda: utils.RowIndex(data)
+
+
+@case(f'utils.population_by_country ({LOOKUPS} consultas)', 'lookup', needs=('numpy',))
+def _(path):
+    import read_csv
+    import utils
+    data = read_csv.read_csv(path, columnar=True)
+    names = _sample_countries(path)
+    utils.get_index(data)
+    return lambda: [utils.population_by_country(data, name) for name in names]
+
+
+@case('CountrySearchIndex (construcción)', 'lookup')
+def _(path):
+    import read_csv
+    from country_search import CountrySearchIndex
+    names = sorted(set(read_csv.read_csv(path, columnar=True).column('Country/Territory')))
+    return lambda: CountrySearchIndex(names)
+
+
+@case('CountrySearchIndex.search (100 consultas)', 'lookup')
+def _(path):
+    import read_csv
+    from country_search import CountrySearchIndex
+    names = sorted(set(read_csv.read_csv(path, columnar=True).column('Country/Territory')))
+    index = CountrySearchIndex(names)
+    queries = [name[:4].lower() for name in _sample_countries(path, 100)]
+    return lambda: [index.search(query, limit=50) for query in queries]
+
+
+# Datos de los gráficos
+
+@case(f'utils.get_population ({LOOKUPS} filas)', 'chart', needs=('numpy',))
+def _(path):
+    import read_csv
+    import utils
+    data = read_csv.read_csv(path, columnar=True)
+    rows = [utils.population_by_country(data, name)[0] for name in _sample_countries(path)]
+    return lambda: [utils.get_population(row) for row in rows]
+
+
+@case('PopulationMatrix (construcción)', 'chart', needs=('pandas',))
+def _(path):
+    import pandas as pd
+    from population_matrix import PopulationMatrix
+    from schema import find_country_column, find_year_columns
+    df = pd.read_csv(path)
+    country_column, year_columns = find_country_column(df), find_year_columns(df)
+    return lambda: PopulationMatrix(df, country_column, year_columns)
+
+
+@case(f'PopulationMatrix.series ({LOOKUPS} países)', 'chart', needs=('pandas',))
+def _(path):
+    import pandas as pd
+    from population_matrix import PopulationMatrix
+    from schema import find_country_column, find_year_columns
+    df = pd.read_csv(path)
+    matrix = PopulationMatrix(df, find_country_column(df), find_year_columns(df))
+    names = _sample_countries(path)
+    return lambda: [matrix.series(name) for name in names]
+
+
+@case('utils.group_by(Continent).sum', 'chart', needs=('numpy',))
+def _(path):
+    import read_csv
+    import utils
+    data = read_csv.read_csv(path, columnar=True)
+    return lambda: utils.group_by(data, 'Continent').sum()
+
+
+@case('charts.draw_bar_chart (20 gráficos)', 'chart', needs=('numpy', 'matplotlib'))
+def _(path):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    import charts
+    import read_csv
+    import utils
+    data = read_csv.read_csv(path, columnar=True)
+    series = [utils.get_population(utils.population_by_country(data, name)[0])
+              for name in _sample_countries(path, 20)]
+    figure = Figure()
+    canvas = FigureCanvasAgg(figure)
+    ax = figure.subplots()
+
+    def draw():
+        for labels, values in series:
+            ax.clear()
+            charts.draw_bar_chart(ax, list(labels), list(values))
+            canvas.draw()
+    return draw
+
+
+@case('ejerci.crear_grafica_barras (países)', 'chart', needs=('numpy', 'matplotlib'))
+def _(path):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    import ejerci
+    rows = list(ejerci.iterar_csv(path))
+    header, data = rows[0], rows[1:]
+    x, y = header.index('Country/Territory'), header.index('2022 Population')
+
+    def draw():
+        figure = Figure(figsize=(12, 6))
+        canvas = FigureCanvasAgg(figure)
+        labels, values, total = ejerci.preparar_barras(header, data, x, y)
+        ejerci.dibujar_barras(figure.subplots(), header[x], header[y], labels, values, total)
+        canvas.draw()
+    return draw
+
+
+# Generador de datos
+
+def generate_csv(path, rows):
+    """
+    Escribe un CSV con el esquema de app/data.csv. Las filas repiten las reales
+    con los valores numéricos escalados al azar; a partir de la segunda vuelta
+    los nombres llevan un sufijo para que cada país siga siendo único.
+    """
+    with open(os.path.join(ROOT, 'app', 'data.csv'), newline='', encoding='utf-8') as source:
+        reader = csv.reader(source)
+        header = next(reader)
+        base = list(reader)
+    numeric = [position for position, name in enumerate(header)
+               if 'Population' in name or name in ('Area (km²)', 'Density (per km²)', 'Growth Rate')]
+    country = header.index('Country/Territory')
+    rng = random.Random(rows)
+    temporary = path + '.tmp'
+    with open(temporary, 'w', newline='', encoding='utf-8') as target:
+        writer = csv.writer(target)
+        writer.writerow(header)
+        for index in range(rows):
+            cycle, position = divmod(index, len(base))
+            row = list(base[position])
+            if cycle:
+                row[country] = f'{row[country]} {cycle}'
+                for column in numeric:
+                    row[column] = f'{float(row[column]) * rng.uniform(0.5, 1.5):.4f}'
+            writer.writerow(row)
+    os.replace(temporary, path)
+
+
+def dataset(data_dir, rows):
+    # Los archivos generados se reutilizan entre ejecuciones
+    path = os.path.join(data_dir, f'data_{rows}.csv')
+    if not os.path.exists(path):
+        print(f'Generando {rows} filas en {path}...', flush=True)
+        generate_csv(path, rows)
+    return path
+
+
+# Ejecución
+
+def peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024  # bytes en macOS, KiB en Linux
+
+
+def run_case(name, path, repeat):
+    # Se ejecuta en el proceso hijo: prepara, mide y escribe el resultado en JSON
+    sys.path[:0] = [ROOT, os.path.join(ROOT, 'app')]
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    measured = CASES[name]['setup'](path)
+    before = peak_rss_mb()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        measured()
+        times.append(time.perf_counter() - start)
+    after = peak_rss_mb()
+    print(json.dumps({'seconds': min(times), 'peak_rss_mb': after, 'rss_growth_mb': after - before}))
+
+
+def run_in_child(name, path, repeat):
+    info = CASES[name]
+    missing = [module for module in info['needs'] if importlib.util.find_spec(module) is None]
+    if missing:
+        return {'skipped': f"falta {', '.join(missing)}"}
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--run-case', name, path, '--repeat', str(repeat)],
+        capture_output=True, text=True, cwd=ROOT)
+    if completed.returncode != 0:
+        lines = completed.stderr.strip().splitlines()
+        return {'error': lines[-1] if lines else f'código de salida {completed.returncode}'}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=ROOT, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, previous_path):
+    # Muestra la relación de tiempos con una ejecución anterior (>1 es más lento ahora)
+    with open(previous_path, encoding='utf-8') as previous_file:
+        previous = {(item['case'], item['rows']): item for item in json.load(previous_file)['results']}
+    print(f'\nComparación con {previous_path}:')
+    for item in results:
+        old = previous.get((item['case'], item['rows']))
+        if old and 'seconds' in old and 'seconds' in item:
+            ratio = item['seconds'] / old['seconds']
+            flag = '  <- más lento' if ratio > 1.2 else ''
+            print(f"{item['case']:<45} {item['rows']:>9}  x{ratio:5.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Banco de pruebas de carga, búsqueda y gráficos')
+    parser.add_argument('--sizes', nargs='+', type=float, default=[1e3, 1e4, 1e5], help='filas (por ejemplo 1e3 1e7)')
+    parser.add_argument('--cases', nargs='+', default=[], help='grupos (load, lookup, chart) o partes del nombre')
+    parser.add_argument('--repeat', type=int, default=1, help='repeticiones por caso (se guarda la mejor)')
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'package-bench'))
+    parser.add_argument('--output', help='archivo JSON de resultados (por defecto benchmarks/results/<fecha>.json)')
+    parser.add_argument('--compare', help='JSON de una ejecución anterior')
+    parser.add_argument('--run-case', nargs=2, metavar=('CASO', 'CSV'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        run_case(*args.run_case, args.repeat)
+        return
+
+    names = [name for name, info in CASES.items()
+             if not args.cases or any(selected == info['group'] or selected in name for selected in args.cases)]
+    os.makedirs(args.data_dir, exist_ok=True)
+    results = []
+    for rows in sorted(int(size) for size in args.sizes):
+        path = dataset(args.data_dir, rows)
+        print(f'\n{rows} filas')
+        for name in names:
+            info = CASES[name]
+            if info['max_rows'] and rows > info['max_rows']:
+                outcome = {'skipped': f"más de {info['max_rows']} filas"}
+            else:
+                outcome = run_in_child(name, path, args.repeat)
+            results.append({'case': name, 'group': info['group'], 'rows': rows, **outcome})
+            if 'seconds' in outcome:
+                print(f"  {name:<45} {outcome['seconds'] * 1000:10.1f} ms  pico {outcome['peak_rss_mb']:8.1f} MiB"
+                      f"  (+{outcome['rss_growth_mb']:.1f})")
+            else:
+                print(f"  {name:<45} {outcome.get('skipped') or 'error: ' + outcome['error']}")
+
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as output_file:
+        json.dump({
+            'created': datetime.now(timezone.utc).isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': args.repeat,
+            'results': results,
+        }, output_file, indent=2, ensure_ascii=False)
+    print(f'\nResultados guardados en {output}')
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+import sys  # Tamaño en memoria de los objetos de Python
+import unicodedata  # Permite separar letras y acentos para normalizar nombres
+from collections import Counter  # Cuenta n-gramas compartidos en la búsqueda difusa
+
+
+def fold(text):
+    """
+    Normaliza un texto para compararlo: minúsculas y sin acentos.
+    Por ejemplo 'Perú' -> 'peru' y 'CÔTE D'IVOIRE' -> "cote d'ivoire".
+    """
+    # NFKD separa cada letra de su acento; luego se descartan los acentos
+    decomposed = unicodedata.normalize('NFKD', str(text).casefold())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _ngrams(text, size):
+    """Devuelve el conjunto de n-gramas (subcadenas de longitud size) del texto."""
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class CountrySearchIndex:
+    """
+    Índice de búsqueda de nombres (países u otras entidades) construido una sola vez.
+
+    Guarda los nombres normalizados con fold() y un índice de n-gramas (1 a 3
+    caracteres) para encontrar subcadenas sin recorrer todos los nombres. Si no
+    hay coincidencias de subcadena, ofrece sugerencias difusas por similitud
+    de bigramas, que toleran letras cambiadas u omitidas ('Chle' -> 'Chile').
+    """
+
+    def __init__(self, names):
+        self.names = list(names)
+        self._folded = [fold(name) for name in self.names]
+        # Índice invertido: n-grama -> conjunto de posiciones que lo contienen
+        self._grams = {}
+        for position, folded in enumerate(self._folded):
+            for size in (1, 2, 3):
+                for gram in _ngrams(folded, size):
+                    self._grams.setdefault(gram, set()).add(position)
+
+    def memory_usage(self):
+        """
+        Bytes aproximados del índice: listas de nombres, nombres normalizados e
+        índice de n-gramas (los nombres originales se comparten con los datos).
+        """
+        size = sys.getsizeof(self.names) + sys.getsizeof(self._folded) + sys.getsizeof(self._grams)
+        size += sum(sys.getsizeof(folded) for folded in self._folded)
+        size += sum(sys.getsizeof(gram) + sys.getsizeof(positions) for gram, positions in self._grams.items())
+        return size
+
+    def _substring(self, query):
+        """Devuelve las posiciones de los nombres que contienen query."""
+        if len(query) <= 3:
+            return self._grams.get(query, set())
+        # Intersecta los trigramas de la consulta, empezando por el menos frecuente
+        postings = sorted((self._grams.get(gram, set()) for gram in _ngrams(query, 3)), key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        return {position for position in candidates if query in self._folded[position]}
+
+    def _fuzzy(self, query, threshold=0.4):
+        """Devuelve (puntuación, posición) de nombres con bigramas parecidos a query."""
+        query_grams = _ngrams(query, 2)
+        if not query_grams:
+            return []
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self._grams.get(gram, ()))
+        results = []
+        for position, count in shared.items():
+            # Coeficiente de Dice entre los bigramas de la consulta y del nombre
+            name_grams = max(len(self._folded[position]) - 1, 1)
+            score = 2 * count / (len(query_grams) + name_grams)
+            if score >= threshold:
+                results.append((score, position))
+        return results
+
+    def search(self, query, limit=None):
+        """
+        Busca nombres que coincidan con query y los devuelve ordenados por relevancia:
+        coincidencia exacta, prefijo, inicio de palabra y luego cualquier subcadena.
+        Si ninguna contiene la consulta, devuelve las sugerencias difusas más parecidas.
+
+        Args:
+            query (str): Texto a buscar (sin importar mayúsculas ni acentos)
+            limit (int): Número máximo de resultados (None para todos)
+
+        Returns:
+            list: Nombres encontrados, del más al menos relevante
+        """
+        query = fold(query).strip()
+        if not query:
+            return self.names[:limit]
+
+        matches = self._substring(query)
+        if matches:
+            def rank(position):
+                folded = self._folded[position]
+                if folded == query:
+                    return 0, position
+                if folded.startswith(query):
+                    return 1, position
+                if ' ' + query in folded:
+                    return 2, position
+                return 3, position
+            ordered = sorted(matches, key=rank)
+        else:
+            scored = sorted(self._fuzzy(query), key=lambda item: (-item[0], item[1]))
+            ordered = [position for score, position in scored]
+
+        return [self.names[position] for position in ordered[:limit]]
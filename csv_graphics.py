@@ -1,14 +1,36 @@
 # Paso 1: Importamos el módulo csv que proporciona funcionalidades para trabajar con archivos CSV
 import csv
+# Módulos usados por el modo de inspección rápida de archivos grandes
+import io  # Para leer el inicio y el final del archivo como texto
+import mmap  # Para mapear el archivo en memoria sin copiarlo
+import os  # Para conocer el tamaño del archivo y el número de procesadores
+import sys  # Para leer los argumentos de la línea de comandos
+import time  # Para medir la velocidad de lectura
+from collections import deque  # Para guardar solo las últimas filas
+from concurrent.futures import ProcessPoolExecutor  # Para contar filas en varios procesos a la vez
+# Informe de errores compartido con el paquete app (carpeta 'app')
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app'))
+from validation import ErrorReport
+
+BLOQUE = 64 * 1024 * 1024  # Cada proceso recorre su parte en bloques de 64 MiB
+COLA = 1024 * 1024  # Bytes del final del archivo que se leen para mostrar las últimas filas
 
 # Paso 2: Definimos una función para leer archivos CSV
-def leer_csv(nombre_archivo):
+def leer_csv(nombre_archivo, informe=None):
     """
     Esta función abre y lee un archivo CSV, mostrando su contenido
     
     Args:
         nombre_archivo (str): El nombre o ruta del archivo CSV que queremos leer
+        informe (ErrorReport): Informe donde se anotan las filas con un número de
+            campos distinto al de los encabezados (si no se indica, se crea uno)
+    
+    Returns:
+        ErrorReport: El informe con las filas con problemas
     """
+    if informe is None:
+        informe = ErrorReport()
+    
     try:
         # Paso 3: Abrimos el archivo CSV
         # El primer parámetro es el nombre del archivo
@@ -31,6 +53,9 @@ def leer_csv(nombre_archivo):
         for fila in lector_csv:
             print(fila)
             contador += 1
+            # Las filas con campos de más o de menos se anotan en el informe (la fila 1 son los encabezados)
+            if len(fila) != len(encabezados):
+                informe.add('número de campos', 1, [(contador + 1, len(fila))])
         
         # Paso 7: Mostramos cuántas filas de datos leímos
         print(f"\nTotal de filas de datos: {contador}")
@@ -38,6 +63,189 @@ def leer_csv(nombre_archivo):
         # Paso 8: Cerramos el archivo cuando terminamos de usarlo
         archivo.close()
         
+        # Mostramos un único resumen de las filas con problemas
+        if informe:
+            print(f"Advertencia: {informe}")
+        
+    except FileNotFoundError:
+        # Si el archivo no existe, mostramos un mensaje de error
+        print(f"Error: No se encontró el archivo '{nombre_archivo}'")
+    
+    except Exception as e:
+        # Si ocurre cualquier otro error, lo mostramos
+        print(f"Error al leer el archivo: {e}")
+    
+    # Devolvemos el informe para que quien llama pueda revisar los errores
+    return informe
+
+
+# Funciones del modo de inspección rápida (archivos de varios GB)
+# En lugar de imprimir cada fila, se cuentan los saltos de línea directamente sobre los bytes
+# del archivo mapeado en memoria, repartiendo el trabajo entre varios procesos.
+# Un salto de línea dentro de un campo entre comillas no termina una fila, así que cada parte
+# se cuenta dos veces: suponiendo que empieza fuera de comillas y suponiendo que empieza dentro.
+# Al unir los resultados en orden se sabe cuál de las dos cuentas es la correcta.
+
+def contar_bloque(datos):
+    """
+    Cuenta los saltos de línea de un bloque de bytes.
+    
+    Returns:
+        tuple: (filas si empieza fuera de comillas, filas si empieza dentro,
+                paridad del número de comillas del bloque)
+    """
+    # Caso habitual: sin comillas, todos los saltos de línea terminan una fila
+    if b'"' not in datos:
+        saltos = datos.count(b'\n')
+        return saltos, 0, 0
+    # Al separar por comillas, los trozos pares están fuera de comillas y los impares dentro
+    # (si el bloque empieza fuera); si empieza dentro, es al revés
+    trozos = datos.split(b'"')
+    fuera = sum(trozo.count(b'\n') for trozo in trozos[0::2])
+    dentro = sum(trozo.count(b'\n') for trozo in trozos[1::2])
+    return fuera, dentro, (len(trozos) - 1) % 2
+
+def unir_cuentas(cuentas):
+    """
+    Une en orden los resultados de contar_bloque de bloques consecutivos.
+    
+    Returns:
+        tuple: el mismo formato de contar_bloque para el conjunto de bloques
+    """
+    resultado = []
+    for comillas_abiertas in (0, 1):
+        total = 0
+        for fuera, dentro, paridad in cuentas:
+            total += dentro if comillas_abiertas else fuera
+            comillas_abiertas ^= paridad
+        resultado.append(total)
+    return resultado[0], resultado[1], sum(paridad for _, _, paridad in cuentas) % 2
+
+def contar_parte(nombre_archivo, inicio, fin):
+    """
+    Cuenta las filas entre las posiciones inicio y fin del archivo (se ejecuta en otro proceso).
+    """
+    with open(nombre_archivo, 'rb') as archivo:
+        with mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+            return unir_cuentas([contar_bloque(datos[posicion:min(posicion + BLOQUE, fin)])
+                                 for posicion in range(inicio, fin, BLOQUE)])
+
+def dividir_archivo(datos, partes, cola):
+    """
+    Calcula los límites de cada parte, justo después de un salto de línea.
+    El último límite es el inicio del bloque final que se usa para las últimas filas.
+    """
+    tamano = len(datos)
+    limites = [0]
+    for numero in range(1, partes):
+        posicion = datos.find(b'\n', max(limites[-1], tamano * numero // partes))
+        if posicion == -1:
+            break
+        if posicion + 1 > limites[-1]:
+            limites.append(posicion + 1)
+    posicion = datos.find(b'\n', max(limites[-1], tamano - cola))
+    if posicion != -1 and posicion + 1 < tamano:
+        limites.append(posicion + 1)
+    limites.append(tamano)
+    return limites
+
+def primeras_filas(nombre_archivo, n):
+    # Lee solo las primeras n + 1 filas (encabezados incluidos) con csv.reader
+    with open(nombre_archivo, 'r', newline='', encoding='utf-8') as archivo:
+        filas = []
+        for fila in csv.reader(archivo):
+            filas.append(fila)
+            if len(filas) > n:
+                break
+    return filas
+
+def ultimas_filas(datos, inicio, dentro_de_comillas, n):
+    # Lee las últimas n filas a partir de 'inicio', que siempre está justo después de un salto de línea
+    # Si el bloque final no tiene n filas completas (filas muy largas o un archivo pequeño), el inicio
+    # retrocede hasta otro salto de línea, cada vez el doble de lejos, hasta tenerlas o llegar al principio
+    paso = max(len(datos) - inicio, 1)
+    while True:
+        filas = leer_filas_desde(datos, inicio, dentro_de_comillas, n)
+        if len(filas) >= n or inicio == 0:
+            return filas
+        nuevo = datos.rfind(b'\n', 0, max(inicio - paso, 0)) + 1  # 0 si no hay un salto de línea antes
+        # Cada comilla entre el nuevo inicio y el anterior cambia el estado de las comillas
+        dentro_de_comillas ^= datos[nuevo:inicio].count(b'"') % 2
+        inicio = nuevo
+        paso *= 2
+
+def leer_filas_desde(datos, inicio, dentro_de_comillas, n):
+    # Lee como mucho las últimas n filas completas a partir de 'inicio'
+    texto = datos[inicio:].decode('utf-8', errors='replace')
+    if dentro_de_comillas:
+        # El bloque empieza en medio de un campo entre comillas: se añade una comilla para que
+        # csv.reader lo lea como un campo y se descarta esa primera fila incompleta
+        texto = '"' + texto
+    filas = deque(csv.reader(io.StringIO(texto, newline='')), maxlen=n + 1)
+    filas = list(filas)
+    if dentro_de_comillas or inicio == 0:
+        filas = filas[1:]  # Fila incompleta o encabezados
+    return filas[-n:] if n else []
+
+def inspeccionar_csv(nombre_archivo, n=5, procesos=None):
+    """
+    Modo rápido para archivos grandes: muestra los encabezados, las primeras y
+    las últimas n filas, y cuenta las filas sin imprimirlas.
+    
+    Args:
+        nombre_archivo (str): El nombre o ruta del archivo CSV que queremos leer
+        n (int): Número de filas a mostrar al principio y al final
+        procesos (int): Procesos usados para contar (por defecto, uno por procesador)
+    """
+    try:
+        inicio_reloj = time.perf_counter()
+        procesos = procesos or os.cpu_count() or 1
+        
+        # Encabezados y primeras filas
+        filas = primeras_filas(nombre_archivo, n)
+        if not filas:
+            print("El archivo está vacío.")
+            return
+        print("Encabezados del archivo:")
+        print(filas[0])
+        print(f"\nPrimeras {len(filas) - 1} filas:")
+        for fila in filas[1:]:
+            print(fila)
+        
+        with open(nombre_archivo, 'rb') as archivo:
+            with mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+                tamano = len(datos)
+                limites = dividir_archivo(datos, procesos, COLA)
+                partes = list(zip(limites[:-1], limites[1:]))
+                
+                # Cuenta las filas de cada parte, en paralelo si hay más de una
+                if procesos > 1 and len(partes) > 1:
+                    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+                        cuentas = list(ejecutor.map(contar_parte, [nombre_archivo] * len(partes),
+                                                    *zip(*partes)))
+                else:
+                    cuentas = [contar_parte(nombre_archivo, inicio, fin) for inicio, fin in partes]
+                
+                # Las comillas abiertas antes de la última parte indican cómo leer el final
+                comillas_abiertas = unir_cuentas(cuentas[:-1])[2] if len(cuentas) > 1 else 0
+                final = ultimas_filas(datos, partes[-1][0], comillas_abiertas, n)
+                
+                # Total de filas: saltos de línea fuera de comillas, más la última si no termina en salto
+                saltos = unir_cuentas(cuentas)[0]
+                ultima_sin_salto = tamano > 0 and datos[tamano - 1:tamano] != b'\n'
+                total = saltos + ultima_sin_salto - 1  # Sin contar los encabezados
+        
+        print(f"\nÚltimas {len(final)} filas:")
+        for fila in final:
+            print(fila)
+        
+        # Resumen
+        segundos = time.perf_counter() - inicio_reloj
+        print(f"\nTotal de filas de datos: {total}")
+        print(f"Columnas: {len(filas[0])}")
+        print(f"Tamaño: {tamano / 1024 / 1024:.1f} MiB, media de {tamano / max(total, 1):.0f} bytes por fila")
+        print(f"Tiempo: {segundos:.3f} s ({tamano / 1024 / 1024 / max(segundos, 1e-9):.0f} MiB/s con {procesos} procesos)")
+    
     except FileNotFoundError:
         # Si el archivo no existe, mostramos un mensaje de error
         print(f"Error: No se encontró el archivo '{nombre_archivo}'")
@@ -49,8 +257,13 @@ def leer_csv(nombre_archivo):
 
 # Paso 9: Código principal que ejecuta nuestra función
 if __name__ == "__main__":
-    # Nombre del archivo CSV que queremos leer
-    archivo_csv = "./app/data.csv"
+    # Nombre del archivo CSV que queremos leer (se puede indicar otro como argumento)
+    # Con --inspeccionar se usa el modo rápido: python csv_graphics.py archivo.csv --inspeccionar
+    argumentos = [argumento for argumento in sys.argv[1:] if argumento != '--inspeccionar']
+    archivo_csv = argumentos[0] if argumentos else "./app/data.csv"
     
     # Llamamos a nuestra función
-    leer_csv(archivo_csv)
\ No newline at end of file
+    if '--inspeccionar' in sys.argv:
+        inspeccionar_csv(archivo_csv)
+    else:
+        leer_csv(archivo_csv)
\ No newline at end of file
@@ -0,0 +1,70 @@
+import hashlib  # Calcula el hash del contenido para usarlo como clave
+import threading  # Protege la caché cuando varias peticiones la usan a la vez
+from collections import OrderedDict  # Mantiene el orden de uso para el desalojo LRU
+
+
+def content_key(content, block_size=1024 * 1024):
+    """
+    Devuelve una clave estable (hash SHA-256) para un contenido cargado.
+
+    El contenido se procesa por bloques para no crear una copia completa en bytes.
+
+    Args:
+        content (str or bytes): Contenido del archivo (por ejemplo, el base64 de dcc.Upload)
+        block_size (int): Tamaño de cada bloque que se añade al hash
+
+    Returns:
+        str: Hash hexadecimal del contenido
+    """
+    digest = hashlib.sha256()
+    for start in range(0, len(content), block_size):
+        block = content[start:start + block_size]
+        digest.update(block.encode() if isinstance(block, str) else block)
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    """
+    Caché en memoria del servidor para conjuntos de datos ya procesados.
+
+    Cada entrada se guarda junto con su tamaño aproximado en bytes, que debe
+    incluir todo lo que guarda (datos e índices derivados). Cuando se
+    supera el número máximo de entradas o el presupuesto de memoria, se descarta
+    la entrada usada hace más tiempo (LRU). La entrada recién añadida nunca se
+    descarta, aunque por sí sola supere el presupuesto.
+    """
+
+    def __init__(self, max_entries=16, max_bytes=512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # clave -> (entrada, tamaño en bytes)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Devuelve la entrada de la clave (marcándola como usada) o None si no está."""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key, entry, size):
+        """Guarda una entrada con su tamaño en bytes y desaloja las más antiguas si hace falta."""
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (entry, size)
+            self.total_bytes += size
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries
+                                              or self.total_bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -4,51 +4,77 @@ import csv
 import matplotlib.pyplot as plt
 # Importamos numpy para operaciones numéricas
 import numpy as np
+# Importamos os y sys para añadir la carpeta 'app' a las rutas de importación
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app'))
+# Importamos el informe de errores para resumir los valores no numéricos
+from validation import ErrorReport, parse_numbers
 
-def leer_csv(nombre_archivo):
+def iterar_csv(nombre_archivo):
+    """
+    Generador que entrega las filas de un archivo CSV una a una, sin guardarlas
+    en memoria. La primera fila entregada son los encabezados.
+    
+    Args:
+        nombre_archivo (str): Ruta al archivo CSV
+        
+    Yields:
+        list: Cada fila del archivo como una lista de cadenas
+    """
+    # Abrimos el archivo CSV en modo lectura ('r')
+    # newline='' evita problemas con diferentes terminaciones de línea en distintos sistemas operativos
+    # encoding='utf-8' asegura que se manejen correctamente caracteres especiales
+    with open(nombre_archivo, 'r', newline='', encoding='utf-8') as archivo_csv:
+        # yield from entrega las filas del lector CSV a medida que se leen
+        yield from csv.reader(archivo_csv)
+
+def leer_csv(nombre_archivo, informe=None):
     """
     Función que lee un archivo CSV y muestra su contenido
     
     Args:
         nombre_archivo (str): Ruta al archivo CSV
+        informe (ErrorReport): Informe donde se anotan las filas con un número
+            de campos distinto al de los encabezados (si se indica)
         
     Returns:
         tuple: (encabezados, datos) donde encabezados es una lista con los nombres de columnas
                y datos es una lista de filas del archivo CSV
     """
     try:
-        # Abrimos el archivo CSV en modo lectura ('r')
-        # newline='' evita problemas con diferentes terminaciones de línea en distintos sistemas operativos
-        # encoding='utf-8' asegura que se manejen correctamente caracteres especiales
-        with open(nombre_archivo, 'r', newline='', encoding='utf-8') as archivo_csv:
-            
-            # Creamos un objeto lector CSV que nos permitirá procesar el archivo línea por línea
-            lector_csv = csv.reader(archivo_csv)
-            
-            # Leemos la primera línea que normalmente contiene los encabezados de las columnas
-            # next() avanza el iterador y devuelve el siguiente valor (en este caso, la primera fila)
-            encabezados = next(lector_csv)
-            
-            # Imprimimos los encabezados para mostrar la estructura del archivo
-            print(f"Encabezados: {encabezados}")
+        # Obtenemos un generador que entrega las filas del archivo una a una
+        lector_csv = iterar_csv(nombre_archivo)
+        
+        # Leemos la primera línea que normalmente contiene los encabezados de las columnas
+        # next() avanza el iterador y devuelve el siguiente valor (en este caso, la primera fila)
+        encabezados = next(lector_csv)
+        
+        # Imprimimos los encabezados para mostrar la estructura del archivo
+        print(f"Encabezados: {encabezados}")
+        
+        # Creamos una lista vacía para almacenar todas las filas de datos
+        datos = []
+        
+        # Recorremos cada fila restante en el archivo CSV
+        # El generador va entregando cada línea como una lista
+        # enumerate empieza en 2 porque la fila 1 del archivo son los encabezados
+        for numero_fila, fila in enumerate(lector_csv, start=2):
+            # Añadimos cada fila a nuestra lista de datos
+            datos.append(fila)
             
-            # Creamos una lista vacía para almacenar todas las filas de datos
-            datos = []
+            # Anotamos las filas incompletas o con campos de más (sin detener la lectura)
+            if informe is not None and len(fila) != len(encabezados):
+                informe.add('número de campos', 1, [(numero_fila, len(fila))])
             
-            # Recorremos cada fila restante en el archivo CSV
-            # El lector_csv es un iterador que va entregando cada línea como una lista
-            for fila in lector_csv:
-                # Añadimos cada fila a nuestra lista de datos
-                datos.append(fila)
-                
-                # Imprimimos cada fila para visualizar los datos
-                print(fila)
-                
-            # Una vez leídas todas las filas, mostramos el total para tener una idea del tamaño del archivo
-            print(f"\nTotal de filas: {len(datos)}")
+            # Imprimimos cada fila para visualizar los datos
+            print(fila)
             
-            # Devolvemos tanto los encabezados como los datos para poder usarlos en la visualización
-            return encabezados, datos
+        # Una vez leídas todas las filas, mostramos el total para tener una idea del tamaño del archivo
+        print(f"\nTotal de filas: {len(datos)}")
+        
+        # Devolvemos tanto los encabezados como los datos para poder usarlos en la visualización
+        return encabezados, datos
     
     except FileNotFoundError:
         # Capturamos el error específico que ocurre cuando el archivo no existe
@@ -62,7 +88,76 @@ def leer_csv(nombre_archivo):
         # Devolvemos listas vacías para mantener la consistencia del tipo de retorno
         return [], []
 
-def crear_grafica_barras(encabezados, datos, columna_x=0, columna_y=1):
+# Número máximo de barras que se dibujan: a partir de aquí se muestran las
+# mayores y el resto se suma en una barra "Otros", así el tiempo de dibujo no
+# depende del número de categorías
+MAX_BARRAS = 30
+
+def validar_max_barras(max_barras):
+    """
+    Comprueba que max_barras sea None o al menos 1 (con 1 solo queda la barra "Otros")
+    
+    Raises:
+        ValueError: Si max_barras es menor que 1
+    """
+    if max_barras is not None and max_barras < 1:
+        raise ValueError(f"max_barras debe ser al menos 1 (o None): {max_barras}")
+
+def preparar_barras(encabezados, datos, columna_x=0, columna_y=1, informe=None, max_barras=MAX_BARRAS):
+    """
+    Extrae las etiquetas y los valores de la gráfica de barras en una sola pasada
+    
+    Args:
+        encabezados (list): Lista con los nombres de columnas
+        datos (list): Lista de filas con los datos
+        columna_x (int): Índice de la columna de las etiquetas
+        columna_y (int): Índice de la columna de los valores
+        informe (ErrorReport): Informe donde se registran los valores no numéricos
+        max_barras (int): Número máximo de barras (None para dibujarlas todas)
+        
+    Returns:
+        tuple: (etiquetas, valores, total) donde valores es un array de numpy y
+               total es el número de categorías antes de agrupar
+    
+    Raises:
+        ValueError: Si max_barras es menor que 1
+    """
+    validar_max_barras(max_barras)
+    if informe is None:
+        informe = ErrorReport()
+    
+    # Una sola pasada: nos quedamos con las filas que tienen las dos columnas
+    # (así etiquetas y valores siempre quedan alineados)
+    minimo = max(columna_x, columna_y)
+    pares = [(fila[columna_x], fila[columna_y]) for fila in datos if len(fila) > minimo]
+    if not pares:
+        return [], np.array([]), 0
+    # zip(*pares) separa las dos columnas sin otro bucle en Python
+    etiquetas, textos = zip(*pares)
+    
+    # Convertimos los valores a números
+    # parse_numbers comprueba todas las celdas a la vez (sin una excepción ni un aviso
+    # por celda): las no numéricas se cambian por 0 y se anotan en el informe
+    # La fila 1 del archivo son los encabezados, así que los datos empiezan en la fila 2
+    valores = np.array(parse_numbers(textos, encabezados[columna_y], informe, first_row=2, default=0),
+                       dtype=np.float64)
+    total = len(valores)
+    
+    # Con pocas categorías se respeta el orden del archivo
+    if max_barras is None or total <= max_barras:
+        return list(etiquetas), valores, total
+    
+    # Con muchas, nos quedamos con las max_barras - 1 mayores (argpartition no ordena
+    # todo el array) y sumamos el resto en una barra "Otros"
+    n = max_barras - 1
+    posiciones = np.argpartition(-valores, n)[:n]
+    posiciones = posiciones[np.argsort(-valores[posiciones], kind='stable')]
+    otros = valores.sum() - valores[posiciones].sum()
+    etiquetas = [etiquetas[posicion] for posicion in posiciones] + [f'Otros ({total - n})']
+    valores = np.append(valores[posiciones], otros)
+    return etiquetas, valores, total
+
+def crear_grafica_barras(encabezados, datos, columna_x=0, columna_y=1, informe=None, max_barras=MAX_BARRAS):
     """
     Crea una gráfica de barras con los datos del CSV
     
@@ -71,61 +166,47 @@ def crear_grafica_barras(encabezados, datos, columna_x=0, columna_y=1):
         datos (list): Lista de filas con los datos
         columna_x (int): Índice de la columna a usar en el eje X (por defecto 0)
         columna_y (int): Índice de la columna a usar en el eje Y (por defecto 1)
+        informe (ErrorReport): Informe donde se registran los valores no numéricos
+            (si no se indica, se crea uno y se muestra su resumen)
+        max_barras (int): Con más categorías se muestran las mayores y el resto
+            se agrupa en "Otros" (None para dibujarlas todas)
+        
+    Returns:
+        ErrorReport: El informe con los valores no numéricos encontrados
+    
+    Raises:
+        ValueError: Si max_barras es menor que 1 (antes de leer los datos)
     """
+    validar_max_barras(max_barras)
+    if informe is None:
+        informe = ErrorReport()
+        mostrar_informe = True
+    else:
+        mostrar_informe = False
+    
     try:
         # Verificamos que tengamos suficientes columnas en los datos
         if len(encabezados) <= max(columna_x, columna_y):
             print(f"Error: No hay suficientes columnas. El archivo tiene {len(encabezados)} columnas.")
-            return
+            return informe
         
         # Verificamos que tengamos datos
         if not datos:
             print("Error: No hay datos para graficar.")
-            return
-        
-        # Extraemos los valores para los ejes X e Y
-        # Para el eje X, usamos la columna especificada
-        etiquetas_x = [fila[columna_x] for fila in datos if len(fila) > columna_x]
-        
-        # Para el eje Y, intentamos convertir los valores a números
-        valores_y = []
-        for fila in datos:
-            if len(fila) > columna_y:
-                try:
-                    # Intentamos convertir el valor a número
-                    valores_y.append(float(fila[columna_y]))
-                except ValueError:
-                    # Si no se puede convertir, usamos 0
-                    print(f"Advertencia: No se pudo convertir '{fila[columna_y]}' a número. Se usará 0.")
-                    valores_y.append(0)
+            return informe
+        
+        # Extraemos las etiquetas del eje X y los valores del eje Y
+        etiquetas_x, valores_y, total = preparar_barras(encabezados, datos, columna_x, columna_y,
+                                                        informe, max_barras)
+        if mostrar_informe and informe:
+            print(f"Advertencia: {informe}")
+            print("Se usará 0 en su lugar.")
         
         # Creamos la figura y el eje para la gráfica
         fig, ax = plt.subplots(figsize=(12, 6))
         
-        # Generamos las posiciones para las barras
-        x = np.arange(len(etiquetas_x))
-        
-        # Creamos la gráfica de barras
-        barras = ax.bar(x, valores_y, width=0.6, color='skyblue', edgecolor='black')
-        
-        # Personalizamos la gráfica
-        ax.set_xlabel(encabezados[columna_x])  # Etiqueta eje X
-        ax.set_ylabel(encabezados[columna_y])  # Etiqueta eje Y
-        ax.set_title(f'Gráfica de {encabezados[columna_y]} por {encabezados[columna_x]}')  # Título
-        ax.set_xticks(x)  # Posiciones de las etiquetas
-        
-        # Si hay muchas etiquetas, las rotamos para mejor visualización
-        if len(etiquetas_x) > 5:
-            ax.set_xticklabels(etiquetas_x, rotation=45, ha='right')
-        else:
-            ax.set_xticklabels(etiquetas_x)
-        
-        # Añadimos una cuadrícula para facilitar la lectura
-        ax.grid(axis='y', linestyle='--', alpha=0.7)
-        
-        # Añadimos los valores encima de cada barra
-        for i, v in enumerate(valores_y):
-            ax.text(i, v + 0.1, str(round(v, 2)), ha='center')
+        # Dibujamos las barras en el eje
+        dibujar_barras(ax, encabezados[columna_x], encabezados[columna_y], etiquetas_x, valores_y, total)
         
         # Ajustamos el diseño para evitar recortes
         plt.tight_layout()
@@ -135,6 +216,56 @@ def crear_grafica_barras(encabezados, datos, columna_x=0, columna_y=1):
         
     except Exception as e:
         print(f"Error al crear la gráfica: {e}")
+    
+    # Devolvemos el informe para que quien llama pueda revisar los errores
+    return informe
+
+def dibujar_barras(ax, nombre_x, nombre_y, etiquetas_x, valores_y, total=None):
+    """
+    Dibuja las barras, las etiquetas y los valores en un eje de matplotlib
+    
+    Args:
+        ax: Eje de matplotlib donde se dibuja
+        nombre_x (str): Nombre de la columna del eje X
+        nombre_y (str): Nombre de la columna del eje Y
+        etiquetas_x (list): Etiquetas de las barras
+        valores_y (array): Altura de cada barra
+        total (int): Número de categorías antes de agrupar (para el título)
+    """
+    # Generamos las posiciones para las barras
+    x = np.arange(len(etiquetas_x))
+    
+    # Creamos la gráfica de barras
+    barras = ax.bar(x, valores_y, width=0.6, color='skyblue', edgecolor='black')
+    
+    # Personalizamos la gráfica
+    ax.set_xlabel(nombre_x)  # Etiqueta eje X
+    ax.set_ylabel(nombre_y)  # Etiqueta eje Y
+    titulo = f'Gráfica de {nombre_y} por {nombre_x}'
+    if total is not None and total > len(etiquetas_x):
+        # Indicamos que solo se muestran las mayores categorías
+        titulo += f' ({len(etiquetas_x) - 1} mayores de {total})'
+    ax.set_title(titulo)  # Título
+    
+    # Con max_barras=None puede haber miles de barras: las etiquetas y los valores
+    # solo se escriben si caben, porque cada texto es un objeto que hay que dibujar
+    if len(etiquetas_x) > MAX_BARRAS * 4:
+        ax.grid(axis='y', linestyle='--', alpha=0.7)
+        return
+    
+    ax.set_xticks(x)  # Posiciones de las etiquetas
+    
+    # Si hay muchas etiquetas, las rotamos para mejor visualización
+    if len(etiquetas_x) > 5:
+        ax.set_xticklabels(etiquetas_x, rotation=45, ha='right')
+    else:
+        ax.set_xticklabels(etiquetas_x)
+    
+    # Añadimos una cuadrícula para facilitar la lectura
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    
+    # Añadimos los valores encima de cada barra (bar_label los coloca todos de una vez)
+    ax.bar_label(barras, labels=[str(round(v, 2)) for v in valores_y.tolist()], padding=2)
 
 # Punto de entrada cuando el script se ejecuta directamente (no cuando se importa)
 if __name__ == "__main__":
@@ -143,11 +274,17 @@ if __name__ == "__main__":
     nombre_archivo = './app/data2.csv'
     
     # Llamamos a nuestra función para leer el archivo CSV
-    encabezados, datos = leer_csv(nombre_archivo)
+    # El informe reúne las filas con campos de más o de menos y los valores no numéricos
+    informe = ErrorReport()
+    encabezados, datos = leer_csv(nombre_archivo, informe)
     
     # Si tenemos datos, creamos la gráfica de barras
     if encabezados and datos:
         print("\nCreando gráfica de barras...")
         # Por defecto usamos la primera columna para el eje X y la segunda para el eje Y
         # Estos valores pueden ajustarse según el contenido del CSV
-        crear_grafica_barras(encabezados, datos, columna_x=0, columna_y=1)
\ No newline at end of file
+        crear_grafica_barras(encabezados, datos, columna_x=0, columna_y=1, informe=informe)
+    
+    # Mostramos un único resumen con todos los problemas encontrados
+    if informe:
+        print(f"Advertencia: {informe}")
\ No newline at end of file
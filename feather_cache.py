@@ -0,0 +1,72 @@
+# Caché en formato Feather de los CSV leídos con pandas
+#
+# La primera lectura guarda junto al CSV un archivo '<csv>.feather' con la
+# firma del original (fecha de modificación, tamaño y hash de tres muestras).
+# Las siguientes lecturas lo abren con memory_map=True si la firma coincide,
+# sin volver a analizar el texto. La conversión a DataFrame sí copia los datos
+# a memoria de pandas: lo que se ahorra es el análisis del CSV, no la copia.
+# Requiere pyarrow; sin él se usa pd.read_csv.
+import json
+import os
+import sys
+
+import pandas as pd
+
+# La firma del CSV es la misma que usa la caché binaria del paquete app
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app'))
+from csv_cache import source_signature
+
+try:
+    import pyarrow
+    from pyarrow import feather
+except ImportError:
+    pyarrow = None
+
+SUFFIX = '.feather'
+METADATA_KEY = b'csv_source'  # Clave de los metadatos del esquema donde se guarda la firma
+
+
+def _read_cache(cache_path, signature):
+    # Devuelve el DataFrame guardado o None si falta la caché o es de otra versión del CSV
+    try:
+        table = feather.read_table(cache_path, memory_map=True)
+    except (OSError, pyarrow.ArrowInvalid):
+        return None
+    metadata = table.schema.metadata or {}
+    if json.loads(metadata.get(METADATA_KEY, b'null')) != signature:
+        return None
+    # split_blocks=True crea un bloque por columna y evita la copia adicional de
+    # agrupar las columnas del mismo tipo en un solo bloque
+    return table.to_pandas(split_blocks=True)
+
+
+def _write_cache(cache_path, df, signature):
+    # Escribe en un archivo temporal y lo renombra: un lector nunca ve una caché a medias
+    table = pyarrow.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[METADATA_KEY] = json.dumps(signature).encode('utf-8')
+    temporary = f'{cache_path}.{os.getpid()}.tmp'
+    feather.write_feather(table.replace_schema_metadata(metadata), temporary)
+    os.replace(temporary, cache_path)
+
+
+def read_csv_cached(path, **kwargs):
+    """
+    Lee un CSV con pd.read_csv usando la caché Feather cuando está al día.
+    Los argumentos adicionales se pasan a pd.read_csv (solo se usa la caché
+    si no hay ninguno, para no mezclar lecturas con opciones distintas).
+    """
+    if pyarrow is None or kwargs:
+        return pd.read_csv(path, **kwargs)
+    signature = source_signature(path)
+    cache_path = path + SUFFIX
+    df = _read_cache(cache_path, signature)
+    if df is not None:
+        return df
+    df = pd.read_csv(path)
+    try:
+        _write_cache(cache_path, df, signature)
+    except (OSError, pyarrow.ArrowException) as error:
+        # Sin permisos de escritura o columnas que Arrow no admite: se sigue sin caché
+        print(f"No se pudo guardar la caché {cache_path}: {error}")
+    return df
@@ -0,0 +1,65 @@
+import sys  # Tamaño en memoria de los objetos de Python
+
+import numpy as np  # Matriz numérica densa con NaN para valores inválidos
+import pandas as pd  # Conversión vectorizada de columnas a números
+
+
+class PopulationMatrix:
+    """
+    Series de población precalculadas para todos los países de un DataFrame.
+
+    Se construye una sola vez al cargar los datos: convierte de forma vectorizada
+    las columnas de años en una matriz densa países × años de tipo float (NaN donde
+    el valor no es numérico) y guarda un índice país -> fila. Así cada gráfico solo
+    necesita leer una fila de la matriz.
+    """
+
+    def __init__(self, df, country_column, year_columns):
+        self.year_columns = [column for column in year_columns if column in df.columns]
+        # pd.to_numeric con errors='coerce' convierte todos los valores de la
+        # columna a la vez y deja NaN en los que no son números
+        numeric = df[self.year_columns].apply(pd.to_numeric, errors='coerce')
+        self.values = numeric.to_numpy(dtype=float)
+        # Índice país -> primera fila en la que aparece
+        self.rows = {}
+        for position, country in enumerate(df[country_column].tolist()):
+            self.rows.setdefault(country, position)
+
+    def __contains__(self, country):
+        return country in self.rows
+
+    def memory_usage(self):
+        """Bytes aproximados de la matriz y del índice país -> fila (los nombres son los del DataFrame)."""
+        return self.values.nbytes + sys.getsizeof(self.rows)
+
+    def series(self, country):
+        """
+        Devuelve la serie de población de un país, omitiendo los años sin dato válido.
+
+        Args:
+            country (str): Nombre del país
+
+        Returns:
+            tuple: (columnas de año, valores) o None si el país no existe
+        """
+        position = self.rows.get(country)
+        if position is None:
+            return None
+        row = self.values[position]
+        valid = np.flatnonzero(~np.isnan(row))
+        return [self.year_columns[i] for i in valid], row[valid].tolist()
+
+
+_last_matrix = None
+
+
+def get_population_matrix(df, country_column, year_columns):
+    """
+    Devuelve la matriz del DataFrame, reutilizando la última construida si los
+    datos y las columnas no han cambiado.
+    """
+    global _last_matrix
+    key = (len(df), country_column, tuple(year_columns))
+    if _last_matrix is None or _last_matrix[0] != key or _last_matrix[1] is not df:
+        _last_matrix = (key, df, PopulationMatrix(df, country_column, year_columns))
+    return _last_matrix[2]
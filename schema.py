@@ -0,0 +1,75 @@
+import re  # Expresiones regulares para reconocer los encabezados
+from collections import namedtuple  # Estructura ligera para devolver el esquema
+from functools import lru_cache  # Guarda los esquemas ya calculados
+
+# Patrones compilados una sola vez al importar el módulo
+COUNTRY_PATTERN = re.compile(r'country|pais|país')  # Columna con nombres de países
+YEAR_PATTERN = re.compile(r'^\d{4}')  # Columnas que empiezan por un año, como "2022 Population"
+
+# Resultado del análisis de encabezados:
+# - country_column: columna de países (o None)
+# - country_by_name: True si se encontró por su nombre, False si se eligió por tipo de datos
+# - year_columns: columnas de años ordenadas numéricamente
+# - numeric_columns / text_columns: columnas según su tipo de datos
+Schema = namedtuple('Schema', ['country_column', 'country_by_name', 'year_columns',
+                               'numeric_columns', 'text_columns'])
+
+
+@lru_cache(maxsize=256)
+def _infer(columns, kinds):
+    """
+    Analiza los encabezados una sola vez por combinación de columnas y tipos.
+
+    Args:
+        columns (tuple): Nombres de las columnas
+        kinds (tuple): Tipo de cada columna según numpy ('i', 'u', 'f', 'O', ...)
+    """
+    numeric_columns = tuple(column for column, kind in zip(columns, kinds) if kind in 'iuf')
+    text_columns = tuple(column for column, kind in zip(columns, kinds) if kind == 'O')
+
+    # Primero busca una columna cuyo nombre indique países; si no hay, usa la primera de texto
+    country_column = next((column for column in columns if COUNTRY_PATTERN.search(str(column).lower())), None)
+    country_by_name = country_column is not None
+    if country_column is None and text_columns:
+        country_column = text_columns[0]
+
+    # Extrae el año de cada encabezado una sola vez y ordena por ese valor
+    years = []
+    for column in columns:
+        match = YEAR_PATTERN.match(str(column))
+        if match:
+            years.append((int(match.group()), column))
+    years.sort(key=lambda item: item[0])
+    year_columns = tuple(column for _, column in years)
+
+    return Schema(country_column, country_by_name, year_columns, numeric_columns, text_columns)
+
+
+def infer_schema(df):
+    """
+    Devuelve el esquema (columna de países, años y tipos) de un DataFrame.
+
+    El resultado se guarda en caché según los nombres y tipos de las columnas,
+    así que volver a analizar un archivo con los mismos encabezados es inmediato.
+
+    Args:
+        df (pandas.DataFrame): DataFrame con los datos
+
+    Returns:
+        Schema: Esquema inferido
+    """
+    return _infer(tuple(df.columns), tuple(dtype.kind for dtype in df.dtypes))
+
+
+def find_country_column(df):
+    """
+    Encuentra la columna que contiene los nombres de países en el DataFrame.
+    """
+    return infer_schema(df).country_column
+
+
+def find_year_columns(df):
+    """
+    Encuentra las columnas que representan años en los encabezados del DataFrame.
+    """
+    return list(infer_schema(df).year_columns)
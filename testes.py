@@ -1,16 +1,23 @@
-import pandas as pd  # Importa la biblioteca pandas para manipulación y análisis de datos
 import matplotlib.pyplot as plt  # Importa pyplot de matplotlib para crear gráficos y visualizaciones
-import re  # Importa el módulo de expresiones regulares para buscar patrones en texto
 import os.path  # Importa funciones para trabajar con rutas de archivos
-import sys  # Importa funciones del sistema, aunque no se usa directamente en este código
+import sys  # Importa funciones del sistema (se usa para añadir la carpeta 'app' a las rutas de importación)
+from schema import infer_schema  # Detección compartida de columnas de países y años
+from population_matrix import get_population_matrix  # Series de población precalculadas por país
+from country_search import CountrySearchIndex, fold  # Índice de búsqueda parcial/difusa de países y normalización de nombres
+from feather_cache import read_csv_cached  # Lectura de CSV con caché Feather opcional
+# Módulos compartidos con el paquete app (carpeta 'app')
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app'))
+from validation import ErrorReport, validate_frame  # Resumen de valores no numéricos por columna
 
 
-def load_csv_file(file_path):
+def load_csv_file(file_path, report=None):
     """
     Carga un archivo CSV y lo devuelve como un DataFrame de pandas.
     
     Args:
         file_path (str): Ruta al archivo CSV
+        report (ErrorReport): Si se indica, las columnas de años se convierten
+            a números y los valores no numéricos se registran en este informe
     
     Returns:
         pandas.DataFrame: DataFrame con los datos cargados, None si hay error
@@ -18,7 +25,14 @@ def load_csv_file(file_path):
     try:
         # Intenta cargar el archivo CSV utilizando la función read_csv de pandas
         # Esta función lee el contenido del archivo y lo convierte en un DataFrame
-        df = pd.read_csv(file_path)
+        # Si pyarrow está instalado, las siguientes cargas usan una copia Feather
+        # guardada junto al CSV (se descarta si el CSV cambia)
+        df = read_csv_cached(file_path)
+        if report is not None:
+            # Convierte las columnas de años a números en una sola pasada por columna
+            # Los valores que no son números quedan como NaN y se anotan en el informe
+            # (cuántos hay por columna y algunos ejemplos) en lugar de un aviso por celda
+            df = validate_frame(df, find_year_columns(df), report)
         return df  # Devuelve el DataFrame si la carga fue exitosa
     except Exception as e:
         # Captura cualquier error que pueda ocurrir durante la carga (archivo inexistente, mal formateado, etc.)
@@ -36,27 +50,19 @@ def find_country_column(df):
     Returns:
         str or None: Nombre de la columna de países o None si no se encuentra
     """
-    # Primero intenta buscar columnas con palabras clave que indiquen países
-    for column in df.columns:  # Itera por cada nombre de columna en el DataFrame
-        # Usa expresiones regulares para buscar palabras relacionadas con países
-        if re.search(r'country|pais|país', column.lower()):
-            return column  # Si encuentra una coincidencia, devuelve el nombre de esa columna
-    
-    # Si no se encuentra una columna con nombre explícito de país, muestra mensajes informativos
-    print("No se encontró una columna explícita de países.")
-    print("Intentando identificar la columna por el tipo de datos...")
-    
-    # Intenta un enfoque alternativo: buscar columnas que contengan texto (objetos)
-    # select_dtypes filtra las columnas por tipo de datos
-    text_columns = df.select_dtypes(include=['object']).columns
-    
-    if len(text_columns) > 0:  # Si hay al menos una columna de texto
-        # Asume que la primera columna de texto podría contener nombres de países
-        print(f"Usando la columna '{text_columns[0]}' como posible columna de países.")
-        return text_columns[0]  # Devuelve el nombre de esta columna
-    
-    # Si no se encuentra ninguna columna adecuada, devuelve None
-    return None
+    # El análisis de encabezados (patrones compilados y resultado en caché)
+    # está en el módulo compartido schema
+    schema = infer_schema(df)
+    
+    # Si no se encontró una columna con nombre explícito de país, muestra mensajes informativos
+    if not schema.country_by_name:
+        print("No se encontró una columna explícita de países.")
+        print("Intentando identificar la columna por el tipo de datos...")
+        if schema.country_column is not None:
+            # Se asume que la primera columna de texto podría contener nombres de países
+            print(f"Usando la columna '{schema.country_column}' como posible columna de países.")
+    
+    return schema.country_column  # Devuelve el nombre de la columna o None
 
 
 def find_year_columns(df):
@@ -70,23 +76,11 @@ def find_year_columns(df):
     Returns:
         list: Lista ordenada de nombres de columnas que contienen años
     """
-    year_columns = []  # Inicializa una lista vacía para almacenar los nombres de columnas
-    
-    # Recorre cada columna del DataFrame
-    for column in df.columns:
-        # Verifica si el nombre de la columna comienza con 4 dígitos (un año)
-        # ^ indica inicio de cadena, \d{4} significa exactamente 4 dígitos
-        if re.match(r'^\d{4}', str(column)):
-            year_columns.append(column)  # Si coincide, agrega el nombre a la lista
-    
-    # Ordena las columnas de años numéricamente 
-    # La función lambda extrae los primeros 4 dígitos y los convierte a entero
-    year_columns.sort(key=lambda x: int(re.match(r'^\d{4}', x).group()))
-    
-    return year_columns  # Devuelve la lista ordenada de columnas
+    # El esquema ya trae las columnas de años ordenadas numéricamente
+    return list(infer_schema(df).year_columns)
 
 
-def plot_country_population(df, country_column, year_columns, country_name):
+def plot_country_population(df, country_column, year_columns, country_name, output_path=None):
     """
     Genera un gráfico de la población de un país específico a lo largo del tiempo.
     
@@ -95,46 +89,26 @@ def plot_country_population(df, country_column, year_columns, country_name):
         country_column (str): Nombre de la columna que contiene los países
         year_columns (list): Lista de columnas que representan años
         country_name (str): Nombre del país a graficar
+        output_path (str): Ruta del archivo (.png, .svg...) donde guardar el gráfico
+            en lugar de mostrarlo; permite generar gráficos en servidores sin pantalla
     
     Returns:
         bool: True si se generó el gráfico correctamente, False en caso contrario
     """
-    # Filtra el DataFrame para obtener solo las filas del país especificado
-    # Crea un nuevo DataFrame que solo contiene datos del país seleccionado
-    country_data = df[df[country_column] == country_name]
+    # Obtiene la matriz países × años ya convertida a números (se construye una
+    # sola vez por DataFrame; los valores no numéricos quedan como NaN)
+    matrix = get_population_matrix(df, country_column, year_columns)
     
     # Verifica si se encontraron datos para ese país
-    if country_data.empty:
+    if country_name not in matrix:
         print(f"No se encontraron datos para {country_name}")
         return False  # Devuelve False si no hay datos
     
-    # Diccionario para almacenar los datos de población por año
-    population_data = {}
+    # Lee la fila del país: años con dato válido y sus valores de población
+    years, populations = matrix.series(country_name)
     
-    # Recorre cada columna de año para extraer los valores de población
-    for year in year_columns:
-        try:
-            # Convierte el nombre de la columna a string por si acaso no lo es
-            year_str = str(year)
-            
-            # Verifica que existan valores para este año
-            if not country_data[year_str].empty:
-                # Obtiene el primer valor de población para este año y país
-                # iloc[0] accede al primer elemento de la serie
-                population = country_data[year_str].iloc[0]
-                
-                # Intenta convertir el valor a número flotante
-                # Algunos valores podrían ser strings o tener formato no numérico
-                try:
-                    population = float(population)
-                    # Almacena el par año-población en el diccionario
-                    population_data[year_str] = population
-                except (ValueError, TypeError):
-                    # Si no se puede convertir a número, ignora este año
-                    pass
-        except KeyError:
-            # Si la columna no existe en el DataFrame, continúa con la siguiente
-            continue
+    # Diccionario para almacenar los datos de población por año
+    population_data = dict(zip(years, populations))
     
     # Verifica si se encontraron datos de población válidos
     if not population_data:
@@ -173,8 +147,13 @@ def plot_country_population(df, country_column, year_columns, country_name):
     # Ajusta automáticamente los márgenes y espaciado del gráfico
     plt.tight_layout()
     
-    # Muestra el gráfico en pantalla
-    plt.show()
+    if output_path:
+        # Guarda el gráfico en el archivo indicado y libera la figura
+        plt.savefig(output_path)
+        plt.close()
+    else:
+        # Muestra el gráfico en pantalla
+        plt.show()
     
     # Devuelve True para indicar que el gráfico se generó correctamente
     return True
@@ -196,7 +175,9 @@ def main():
         return  # Sale de la función si el archivo no existe
     
     # Intenta cargar el archivo CSV usando la función definida anteriormente
-    df = load_csv_file(file_path)
+    # Los valores no numéricos de las columnas de años se resumen en report
+    report = ErrorReport()
+    df = load_csv_file(file_path, report)
     if df is None:
         return  # Sale de la función si hubo un error al cargar el archivo
     
@@ -222,10 +203,18 @@ def main():
     # join concatena los elementos de la lista con comas
     print(f"Columnas de años identificadas: {', '.join(map(str, year_columns))}")
     
+    # Muestra un único resumen de los valores no numéricos en lugar de un aviso por celda
+    if report:
+        print(report)
+    
     # Obtiene la lista de países únicos del DataFrame y la ordena alfabéticamente
     # unique() devuelve los valores únicos de una columna
     countries = sorted(df[country_column].unique())
     
+    # Construye una sola vez el índice de búsqueda (sin acentos ni mayúsculas)
+    # para no recorrer toda la lista de países en cada consulta
+    search_index = CountrySearchIndex(countries)
+    
     # Muestra la lista numerada de países disponibles
     print("\nPaíses disponibles:")
     for i, country in enumerate(countries, 1):  # enumerate con start=1 para numerar desde 1
@@ -256,12 +245,19 @@ def main():
                 continue  # Vuelve al inicio del bucle
         else:
             # Si no es un número, busca países que contengan el texto ingresado
-            # Crea una lista de países que coinciden parcialmente con la entrada
-            matches = [country for country in countries if selection.lower() in country.lower()]
+            # El índice devuelve las coincidencias ordenadas por relevancia y,
+            # si no hay ninguna, sugerencias parecidas (por ejemplo 'Chle' -> 'Chile')
+            matches = search_index.search(selection)
             
             # Verifica los resultados de la búsqueda
-            if len(matches) == 1:
-                # Si hay una única coincidencia, selecciona ese país
+            if len(matches) == 1 and fold(selection).strip() in fold(matches[0]):
+                # Si hay una única coincidencia que contiene el texto, selecciona ese país
+                selected_country = matches[0]
+            elif len(matches) == 1:
+                # Una única sugerencia difusa (el texto no aparece en el nombre): se pide confirmación
+                confirmation = input(f"No se encontró '{selection}'. ¿Quiso decir '{matches[0]}'? (s/n): ").strip()
+                if confirmation.lower() not in ('s', 'si', 'sí'):
+                    continue  # Vuelve al inicio del bucle
                 selected_country = matches[0]
             elif len(matches) > 1:
                 # Si hay múltiples coincidencias, muestra la lista y pide al usuario que elija
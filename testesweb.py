@@ -1,16 +1,61 @@
 import dash
+import flask
 from dash import dcc, html, Input, Output, State
+from dash.exceptions import PreventUpdate
 import pandas as pd
 import plotly.express as px
-import re
 import os.path
 import base64
 import io
+import sys
+from country_search import CountrySearchIndex
+from dataset_cache import DatasetCache, content_key
+from population_matrix import PopulationMatrix
+from schema import find_country_column, find_year_columns
+
+# Módulos compartidos con el paquete app: instrumentación (APP_METRICS=1 la activa)
+# y el informe de valores no numéricos
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app'))
+import instrument
+from validation import ErrorReport, validate_frame
+
+# Número máximo de países que se envían al navegador en el desplegable
+SEARCH_LIMIT = 50
+
+# Filas que pandas procesa en cada bloque al leer un archivo cargado
+CHUNK_ROWS = 100_000
+
+# Progreso de las cargas en curso: identificador de la carga -> fracción procesada (0 a 1).
+# El identificador lo genera el navegador en cada carga, así que dos usuarios que suben
+# archivos con el mismo nombre (o el mismo archivo) no comparten la barra de progreso
+upload_progress = {}
+
+# Archivos ya procesados (DataFrame, índices y columnas detectadas) guardados
+# en el servidor; el navegador solo conserva la clave (hash del contenido)
+dataset_cache = DatasetCache(max_entries=16, max_bytes=512 * 1024 * 1024)
 
 # Inicializa la aplicación Dash
 app = dash.Dash(__name__, suppress_callback_exceptions=True)
 server = app.server  # Necesario para desplegar en servidores como Heroku
 
+
+# Perfiles con cProfile bajo demanda: con APP_PROFILE_DIR=carpeta se perfilan los callbacks
+# de carga del archivo y del gráfico (no el progreso ni la búsqueda, que se llaman a menudo)
+# y cualquier petición con ?profile=1 o la cabecera X-Profile: 1
+if os.environ.get('APP_PROFILE_DIR'):
+    server.wsgi_app = instrument.ProfileMiddleware(server.wsgi_app, os.environ['APP_PROFILE_DIR'],
+                                                   paths=('/_dash-update-component',),
+                                                   outputs=('output-data-upload', 'population-graph'))
+
+
+# Tiempos de cada etapa (lectura, índices, gráfico) en formato Prometheus;
+# '?format=json' devuelve lo mismo como JSON (igual que appweb)
+@server.route('/metrics')
+def metrics():
+    if flask.request.args.get('format') == 'json':
+        return flask.jsonify(instrument.snapshot())
+    return instrument.prometheus_text(), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
 # Diseño de la aplicación
 app.layout = html.Div([
     html.H1("Visualizador de Población por País", style={'textAlign': 'center', 'marginBottom': 30}),
@@ -36,6 +81,8 @@ app.layout = html.Div([
             },
             multiple=False
         ),
+        html.Div(id='upload-progress'),
+        dcc.Interval(id='upload-progress-interval', interval=500, disabled=True),
         html.Div(id='output-data-upload'),
     ]),
     
@@ -54,9 +101,8 @@ app.layout = html.Div([
     ], style={'marginTop': 30}),
     
     # Almacenamiento de datos
-    dcc.Store(id='stored-data'),
-    dcc.Store(id='country-column'),
-    dcc.Store(id='year-columns'),
+    dcc.Store(id='dataset-key'),
+    dcc.Store(id='upload-id'),
     
     # Pie de página
     html.Footer([
@@ -65,150 +111,253 @@ app.layout = html.Div([
     ], style={'marginTop': 50})
 ])
 
-def parse_contents(contents, filename):
+class Base64Reader(io.RawIOBase):
+    """
+    Archivo de solo lectura que decodifica el base64 de una carga por bloques.
+    
+    Evita crear de golpe los bytes decodificados y el texto completo: pandas lee
+    del objeto a medida que lo necesita y solo se decodifica ese fragmento.
+    """
+    
+    # Múltiplo de 4 para que cada bloque de base64 se pueda decodificar por separado
+    BLOCK_SIZE = 4 * 256 * 1024
+    
+    def __init__(self, contents, start=0):
+        self._contents = contents
+        self._position = start
+        self._start = start
+        self._pending = bytearray()  # Bytes decodificados que aún no se han entregado
+        self._offset = 0  # Posición en _pending del primer byte pendiente
+    
+    def readable(self):
+        return True
+    
+    @property
+    def progress(self):
+        """Fracción del contenido ya decodificada (0 a 1)"""
+        total = len(self._contents) - self._start
+        return (self._position - self._start) / total if total else 1.0
+    
+    def readinto(self, buffer):
+        if len(self._pending) - self._offset < len(buffer):
+            # Solo al decodificar un bloque nuevo se descarta lo ya entregado; cada lectura
+            # avanza _offset sin volver a copiar el resto de _pending
+            del self._pending[:self._offset]
+            self._offset = 0
+            while len(self._pending) < len(buffer) and self._position < len(self._contents):
+                block = self._contents[self._position:self._position + self.BLOCK_SIZE]
+                self._position += len(block)
+                self._pending += base64.b64decode(block)
+        size = min(len(buffer), len(self._pending) - self._offset)
+        buffer[:size] = self._pending[self._offset:self._offset + size]
+        self._offset += size
+        return size
+
+
+@instrument.timed('parse_contents')
+def parse_contents(contents, filename, upload_id=None):
     """
     Procesa el contenido del archivo cargado
+    
+    El progreso de la lectura se publica en upload_progress[upload_id]
+    
+    Devuelve el resumen para mostrar y la entrada para la caché de datos
+    (None si el archivo no se pudo procesar)
     """
-    content_type, content_string = contents.split(',')
-    decoded = base64.b64decode(content_string)
+    # El contenido tiene la forma 'data:<tipo>;base64,<datos>'; se usa la posición
+    # de la coma en lugar de split() para no copiar los datos
+    data_start = contents.index(',') + 1
     
     try:
         if 'csv' in filename.lower():
-            # Leer el archivo CSV
-            df = pd.read_csv(io.StringIO(decoded.decode('utf-8')))
+            # Leer el archivo CSV por bloques directamente desde el base64,
+            # informando del progreso tras cada bloque
+            raw = Base64Reader(contents, data_start)
+            chunks = []
+            with instrument.timer('parse_contents.read_csv'):
+                with pd.read_csv(io.BufferedReader(raw, buffer_size=1024 * 1024),
+                                 encoding='utf-8', chunksize=CHUNK_ROWS) as reader:
+                    for chunk in reader:
+                        chunks.append(chunk)
+                        if upload_id is not None:
+                            upload_progress[upload_id] = raw.progress
+                df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+            del chunks
             
             # Identificar columnas de países y años
             country_column = find_country_column(df)
             year_columns = find_year_columns(df)
             
             if country_column and year_columns:
-                return html.Div([
-                    html.H5(f"Archivo cargado: {filename}"),
-                    html.P(f"Contiene {df.shape[0]} filas y {df.shape[1]} columnas."),
-                    html.P(f"Columna de países identificada: {country_column}"),
-                    html.P(f"Años identificados: {', '.join(year_columns[:5])}{'...' if len(year_columns) > 5 else ''}")
-                ]), df.to_json(date_format='iso', orient='split'), country_column, year_columns
+                # Convertir las columnas de años a números (vectorizado) y resumir los valores no válidos
+                errors = ErrorReport()
+                df = validate_frame(df, year_columns, errors)
+                with instrument.timer('parse_contents.index'):
+                    dataset = {
+                        'df': df,
+                        'errors': errors,
+                        'country_column': country_column,
+                        'year_columns': year_columns,
+                        'matrix': PopulationMatrix(df, country_column, year_columns),
+                        'search_index': CountrySearchIndex(sorted(df[country_column].unique())),
+                    }
+                return describe_dataset(filename, dataset), dataset
             else:
                 return html.Div([
                     html.H5(f"Archivo cargado: {filename}"),
                     html.P("No se pudieron identificar las columnas necesarias en el archivo.")
-                ]), None, None, None
+                ]), None
         else:
             return html.Div([
                 html.H5(f"El archivo {filename} no es un CSV válido.")
-            ]), None, None, None
+            ]), None
     except Exception as e:
         return html.Div([
             html.H5(f"Error al procesar el archivo: {filename}"),
             html.P(str(e))
-        ]), None, None, None
+        ]), None
 
-def find_country_column(df):
+def describe_dataset(filename, dataset):
     """
-    Encuentra la columna que contiene los nombres de países en el DataFrame.
+    Genera el resumen de un archivo ya procesado
     """
-    # Primero intenta buscar columnas con palabras clave que indiquen países
-    for column in df.columns:
-        if re.search(r'country|pais|país', column.lower()):
-            return column
-    
-    # Intenta un enfoque alternativo: buscar columnas que contengan texto (objetos)
-    text_columns = df.select_dtypes(include=['object']).columns
-    
-    if len(text_columns) > 0:
-        return text_columns[0]
-    
-    return None
+    df = dataset['df']
+    year_columns = dataset['year_columns']
+    return html.Div([
+        html.H5(f"Archivo cargado: {filename}"),
+        html.P(f"Contiene {df.shape[0]} filas y {df.shape[1]} columnas."),
+        html.P(f"Columna de países identificada: {dataset['country_column']}"),
+        html.P(f"Años identificados: {', '.join(year_columns[:5])}{'...' if len(year_columns) > 5 else ''}"),
+        # Resumen de los valores no numéricos en las columnas de años (se ignoran en los gráficos)
+        html.Pre(str(dataset['errors'])) if dataset['errors'] else None
+    ])
 
+# Activa la consulta del progreso en el navegador en cuanto llega un archivo y le
+# asigna un identificador aleatorio; el procesado empieza al cambiar ese identificador
+app.clientside_callback(
+    "function(contents) {"
+    "    const uploadId = contents ? Date.now().toString(36) + Math.random().toString(36).slice(2) : null;"
+    "    return [!contents, uploadId];"
+    "}",
+    [Output('upload-progress-interval', 'disabled', allow_duplicate=True),
+     Output('upload-id', 'data')],
+    Input('upload-data', 'contents'),
+    prevent_initial_call=True
+)
 
-def find_year_columns(df):
-    """
-    Encuentra las columnas que representan años en los encabezados del DataFrame.
-    """
-    year_columns = []
-    
-    for column in df.columns:
-        if re.match(r'^\d{4}', str(column)):
-            year_columns.append(column)
-    
-    # Ordena las columnas de años numéricamente
-    year_columns.sort(key=lambda x: int(re.match(r'^\d{4}', x).group()))
-    
-    return year_columns
+
+@app.callback(
+    Output('upload-progress', 'children', allow_duplicate=True),
+    [Input('upload-progress-interval', 'n_intervals')],
+    [State('upload-id', 'data'),
+     State('upload-data', 'filename')],
+    prevent_initial_call=True
+)
+def update_progress(n_intervals, upload_id, filename):
+    progress = upload_progress.get(upload_id)
+    if progress is None:
+        raise PreventUpdate
+    return html.Div([
+        html.Progress(value=f'{progress:.2f}', max='1'),
+        html.Span(f" Procesando {filename}: {progress:.0%}")
+    ])
 
 
 @app.callback(
     [Output('output-data-upload', 'children'),
-     Output('stored-data', 'data'),
-     Output('country-column', 'data'),
-     Output('year-columns', 'data'),
+     Output('upload-progress', 'children'),
+     Output('upload-progress-interval', 'disabled'),
+     Output('dataset-key', 'data'),
      Output('country-dropdown', 'options'),
      Output('country-dropdown', 'disabled'),
      Output('plot-button', 'disabled')],
-    [Input('upload-data', 'contents')],
-    [State('upload-data', 'filename')]
+    [Input('upload-id', 'data')],
+    [State('upload-data', 'contents'),
+     State('upload-data', 'filename')]
 )
-def update_output(contents, filename):
-    if contents is None:
-        return None, None, None, None, [], True, True
+def update_output(upload_id, contents, filename):
+    if upload_id is None or contents is None:
+        return None, None, True, None, [], True, True
     
-    children, data, country_column, year_columns = parse_contents(contents, filename)
+    # Si el mismo archivo ya se procesó, se reutiliza desde la caché
+    dataset_key = content_key(contents)
+    dataset = dataset_cache.get(dataset_key)
+    if dataset is None:
+        try:
+            children, dataset = parse_contents(contents, filename, upload_id)
+        finally:
+            upload_progress.pop(upload_id, None)
+        if dataset is None:
+            return children, None, True, None, [], True, True
+        # El presupuesto de la caché cuenta el DataFrame y también la matriz y el índice de búsqueda
+        size = (int(dataset['df'].memory_usage(deep=True).sum()) + dataset['matrix'].memory_usage()
+                + dataset['search_index'].memory_usage())
+        dataset_cache.put(dataset_key, dataset, size)
+    else:
+        children = describe_dataset(filename, dataset)
     
-    if data is None:
-        return children, None, None, None, [], True, True
+    # El navegador solo recibe los primeros países; el resto se busca en el servidor
+    country_options = [{'label': country, 'value': country}
+                       for country in dataset['search_index'].search('', limit=SEARCH_LIMIT)]
     
-    # Cargar DataFrame desde los datos almacenados
-    df = pd.read_json(data, orient='split')
+    return children, None, True, dataset_key, country_options, False, False
+
+
+@app.callback(
+    Output('country-dropdown', 'options', allow_duplicate=True),
+    [Input('country-dropdown', 'search_value')],
+    [State('country-dropdown', 'value'),
+     State('dataset-key', 'data')],
+    prevent_initial_call=True
+)
+def search_countries(search_value, selected_country, dataset_key):
+    """
+    Busca en el servidor los países que coinciden con el texto escrito en el desplegable
+    """
+    dataset = dataset_cache.get(dataset_key)
+    if not search_value or dataset is None:
+        raise PreventUpdate
     
-    # Crear opciones para el dropdown de países
-    country_options = [{'label': country, 'value': country} 
-                      for country in sorted(df[country_column].unique())]
+    matches = dataset['search_index'].search(search_value, limit=SEARCH_LIMIT)
+    # El país ya seleccionado debe seguir entre las opciones para no perderlo
+    if selected_country and selected_country not in matches:
+        matches.append(selected_country)
     
-    return children, data, country_column, year_columns, country_options, False, False
+    # El desplegable vuelve a filtrar las opciones en el navegador con el texto
+    # escrito; se añade ese texto a 'search' para que no oculte las sugerencias
+    # sin acentos o difusas que ya ha elegido el servidor
+    return [{'label': country, 'value': country, 'search': f'{country} {search_value}'}
+            for country in matches]
 
 
 @app.callback(
     [Output('population-graph', 'figure'),
      Output('graph-title', 'style')],
     [Input('plot-button', 'n_clicks')],
-    [State('stored-data', 'data'),
-     State('country-column', 'data'),
-     State('year-columns', 'data'),
+    [State('dataset-key', 'data'),
      State('country-dropdown', 'value')]
 )
-def update_graph(n_clicks, data, country_column, year_columns, selected_country):
-    if n_clicks is None or data is None or selected_country is None:
+@instrument.timed('update_graph')
+def update_graph(n_clicks, dataset_key, selected_country):
+    if n_clicks is None or dataset_key is None or selected_country is None:
         return {}, {'display': 'none'}
     
-    # Cargar DataFrame desde los datos almacenados
-    df = pd.read_json(data, orient='split')
+    # Recuperar de la caché el DataFrame ya procesado e indexado
+    # (None si se descartó por falta de memoria: hay que volver a cargarlo)
+    dataset = dataset_cache.get(dataset_key)
+    if dataset is None:
+        return {}, {'display': 'none'}
     
-    # Filtrar datos para el país seleccionado
-    country_data = df[df[country_column] == selected_country]
+    # Leer la fila del país en la matriz países × años precalculada
+    with instrument.timer('update_graph.series'):
+        series = dataset['matrix'].series(selected_country)
     
-    if country_data.empty:
+    if series is None:
         return {}, {'display': 'none'}
     
-    # Diccionario para almacenar los datos de población por año
-    population_data = {}
-    
-    # Recorre cada columna de año para extraer los valores de población
-    for year in year_columns:
-        try:
-            year_str = str(year)
-            
-            if not country_data[year_str].empty:
-                population = country_data[year_str].iloc[0]
-                
-                try:
-                    population = float(population)
-                    # Extrae solo el año (primeros 4 dígitos) para la visualización
-                    year_display = year_str[:4]
-                    population_data[year_display] = population
-                except (ValueError, TypeError):
-                    pass
-        except KeyError:
-            continue
+    # Extrae solo el año (primeros 4 dígitos) para la visualización
+    years, populations = series
+    population_data = {str(year)[:4]: population for year, population in zip(years, populations)}
     
     # Crear DataFrame para Plotly
     plot_df = pd.DataFrame({